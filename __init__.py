@@ -1,17 +1,25 @@
 from datetime import datetime, timedelta
+import functools
 import html
 import base64
+from typing import Optional
 
-import httpx
-from nonebot import on_command, on_fullmatch
+from nonebot import get_driver, on_command, on_fullmatch
 from nonebot.adapters.onebot.v11 import Message, MessageEvent, GroupMessageEvent, Bot, MessageSegment
+from nonebot.exception import MatcherException
 from nonebot.params import CommandArg, ArgStr
+from nonebot.permission import SUPERUSER
 from nonebot.plugin import PluginMetadata
 from nonebot.rule import Rule
 from nonebot.typing import T_State
 
 from .config import Config
-from .libraries.db_utils import bind_user, get_bot_key, is_already_bound, unbind_user
+from .libraries.async_db_utils import bind_user, get_bot_key, is_already_bound, unbind_user
+from .libraries.deadline import command_deadline
+from .libraries.http_client import close_http_client, get_http_client, http2_enabled, open_http_client, protocol_counts
+from .libraries.prefetch import PrefetchScheduler
+from .libraries.priority import Priority
+from .libraries.turbo_api import TurboApiError, gather_requests, turbo_api
 from .permission.models import UserPermission
 
 
@@ -28,6 +36,66 @@ def _check_group() -> Rule:
 
 group_rule = _check_group()
 
+driver = get_driver()
+driver.on_startup(open_http_client)
+driver.on_shutdown(close_http_client)
+
+# 定期把热门机厅的信息预取进响应缓存
+arcade_prefetch = PrefetchScheduler(
+    turbo_api.prefetch_arcade_info, turbo_api.arcade_info_due,
+    Config.prefetch_top_n, Config.prefetch_interval, Config.prefetch_budget, Config.prefetch_bot_key or None,
+)
+driver.on_startup(arcade_prefetch.start)
+driver.on_shutdown(arcade_prefetch.stop)
+
+
+async def _call_api(matcher, action: str, request, bad_request: Optional[str] = None, show_response: bool = False):
+    """等待 Turbo API 请求并返回结果；失败时回复对应提示（bad_request 为 400 时的提示）并结束事件处理
+
+    show_response 为 True 时在提示后附上服务器响应的开头，用于需要服务器给出原因的请求（如绑定）。
+    """
+    try:
+        return await request
+    except Exception as e:
+        await _finish_api_error(matcher, action, e, bad_request, show_response)
+
+
+async def _finish_api_error(matcher, action: str, error: Exception, bad_request: Optional[str] = None,
+                            show_response: bool = False):
+    """回复 Turbo API 请求失败的提示并结束事件处理，用于 gather_requests 返回的异常"""
+    if isinstance(error, TurboApiError):
+        reply = error.describe(action, bad_request)
+        if reply and show_response and error.text:
+            reply += f"响应：{error.text[:100]}"
+        await matcher.finish(reply or None)
+    await matcher.finish(f"{action}过程中出现错误：{error}")
+
+
+def _reply_errors(matcher, action: str):
+    """事件处理函数中请求以外的步骤（解析响应、生成回复）出错时，回复“…过程中出现错误”而不是没有任何回复
+
+    需放在 command_deadline 之下；finish/reject 等 MatcherException 照常抛出。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except MatcherException:
+                raise
+            except Exception as e:
+                await _finish_api_error(matcher, action, e)
+        return wrapper
+    return decorator
+
+
+def _stale_note(stale_age: Optional[float]) -> str:
+    """返回的是缓存中已过期的数据时，在回复末尾注明数据年龄"""
+    if stale_age is None:
+        return ""
+    return f"\n\n（{stale_age:.0f} 秒前的数据，正在后台更新）"
+
+
 __plugin_meta__ = PluginMetadata(
     name="turbo",
     description="给turbo用户提供指令服务的插件",
@@ -70,6 +138,9 @@ show_rivals = on_command('showRivals', aliases={'showrivals', 'rivals', '对手'
 add_rival = on_command('addRival', aliases={'addrival', '添加对手', '加对手'}, priority=5, rule=group_rule)
 remove_rival = on_command('removeRival', aliases={'removerival', '删除对手', '移除对手'}, priority=5, rule=group_rule)
 
+# === 管理指令 ===
+show_stats = on_command('tbstats', aliases={'缓存统计'}, permission=SUPERUSER, priority=5, rule=group_rule)
+
 @help.handle()
 async def handle_help(event: MessageEvent):
     """
@@ -133,6 +204,8 @@ async def handle_help(event: MessageEvent):
 
 
 @bind.handle()
+@command_deadline()
+@_reply_errors(bind, "绑定")
 async def handle_bind(bot: Bot, event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -175,31 +248,23 @@ API接口：POST /bot/bind
     if not bot_token:
         await bind.send("绑定命令后需要包含botToken。")
         return
-    if is_already_bound(qqid):
+    if await is_already_bound(qqid):
         await bind.send("您已经绑定过一个bot_token，无需重复绑定。")
         return
 
-    payload = {"botToken": bot_token, "botName": Config.bot_name}
+    response_data = await _call_api(bind, "绑定", turbo_api.bind(bot_token, Config.bot_name), show_response=True)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/bot/bind', json=payload)
-
-        if response.status_code == 200:
-            try:
-                response_data = response.json()
-                bot_key = response_data["botKey"]
-                bind_user(qqid, bot_token, bot_key)
-                await bind.send("绑定成功！")
-            except Exception:
-                await bind.send(f"绑定失败，服务器返回数据异常：{response.text[:100]}")
-        else:
-            await bind.send(f"绑定失败，HTTP响应状态码为{response.status_code}，响应：{response.text[:100]}")
-    except Exception as e:
-        await bind.send(f"绑定过程中出现错误：{e}")
+        bot_key = response_data["botKey"]
+        await bind_user(qqid, bot_token, bot_key)
+        await bind.send("绑定成功！")
+    except Exception:
+        await bind.send(f"绑定失败，服务器返回数据异常：{str(response_data)[:100]}")
 
 
 @unbind.handle()
+@command_deadline()
+@_reply_errors(unbind, "解绑")
 async def handle_unbind(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -223,26 +288,23 @@ API接口：POST /bot/unbind
         return
     
     qqid = str(event.get_user_id())
-    if not is_already_bound(qqid):
+    if not await is_already_bound(qqid):
         await unbind.send("您还未绑定bot，无法解绑！")
         return
-    bot_key = get_bot_key(qqid)
-    payload = {"botKey": bot_key}
+    bot_key = await get_bot_key(qqid)
 
+    await _call_api(unbind, "解绑", turbo_api.unbind(bot_key))
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/bot/unbind', json=payload)
-
-        if response.status_code == 200:
-            unbind_user(qqid)
-            await unbind.send("解绑成功！")
-        else:
-            await unbind.send(f"解绑失败，HTTP响应状态码为{response.status_code}。")
+        await unbind_user(qqid)
     except Exception as e:
         await unbind.send(f"解绑过程中出现错误：{e}")
+        return
+    await unbind.send("解绑成功！")
 
 
 @set_name.handle()
+@command_deadline()
+@_reply_errors(set_name, "修改名称")
 async def handle_set_name(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -277,42 +339,19 @@ API接口：POST /web/setMaimaiName
         await set_name.send("修改名称命令后需要包含新的名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await set_name.send("您尚未绑定，请先使用/bind 指令绑定。")
         return
 
-    payload = {"maimaiName": new_name}
-
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{Config.api_base_url}/web/setMaimaiName', json=payload, headers=headers
-            )
-
-        if response.status_code == 200:
-            await set_name.send("名称修改成功！")
-        elif response.status_code == 400:
-            await set_name.send("修改名称失败，验证码验证失败或数据不合法。")
-        elif response.status_code == 401:
-            await set_name.send("请求的Token缺失或不合法，请检查权限。")
-        elif response.status_code == 403:
-            await set_name.send("权限不足，无法修改名称。")
-        elif response.status_code == 410:
-            await set_name.send("该用户已被封禁，请联系管理员。")
-        elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await set_name.send(f"{error_message}")
-        else:
-            await set_name.send(f"修改名称失败，HTTP响应状态码为{response.status_code}。")
-    except Exception as e:
-        await set_name.send(f"修改名称过程中出现错误：{e}")
+    await _call_api(set_name, "修改名称", turbo_api.set_maimai_name(bot_key, new_name), "修改名称失败，验证码验证失败或数据不合法。")
+    await set_name.send("名称修改成功！")
 
 
 
 @reset_name.handle()
+@command_deadline()
+@_reply_errors(reset_name, "重置名称")
 async def handle_reset_name(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -335,36 +374,17 @@ API接口：POST /web/resetMaimaiName
     
     qqid = str(event.get_user_id())
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await reset_name.send("您尚未绑定，请先使用/bind 指令绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/resetMaimaiName', headers=headers)
-
-        if response.status_code == 200:
-            await reset_name.send("名称重置成功！")
-        elif response.status_code == 400:
-            await reset_name.send("重置名称失败，验证码验证失败或数据不合法。")
-        elif response.status_code == 401:
-            await reset_name.send("请求的Token缺失或不合法，请检查权限。")
-        elif response.status_code == 403:
-            await reset_name.send("权限不足，无法重置名称。")
-        elif response.status_code == 410:
-            await reset_name.send("该用户已被封禁，请联系管理员。")
-        elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await reset_name.send(f"{error_message}")
-        else:
-            await reset_name.send(f"重置名称失败，HTTP响应状态码为{response.status_code}。")
-    except Exception as e:
-        await reset_name.send(f"重置名称过程中出现错误：{e}")
+    await _call_api(reset_name, "重置名称", turbo_api.reset_maimai_name(bot_key), "重置名称失败，验证码验证失败或数据不合法。")
+    await reset_name.send("名称重置成功！")
 
 @show_name.handle()
+@command_deadline()
+@_reply_errors(show_name, "获取ID")
 async def handle_show_name(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -386,42 +406,20 @@ API接口：GET /web/showMaimaiName
         return
 
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await show_name.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {
-        "Authorization": f"BotKey {bot_key}"
-    }
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showMaimaiName', headers=headers)
-
-            if response.status_code == 200:
-                current_name = response.text
-                await show_name.send(f"您当前的ID为：{current_name}")
-            elif response.status_code == 400:
-                await show_name.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_name.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_name.send("权限不足，无法获取当前ID。")
-            elif response.status_code == 410:
-                await show_name.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_name.send(f"{error_message}")
-            else:
-                await show_name.send(f"获取ID失败，HTTP响应状态码为：{response.status_code}。")
-    except Exception as e:
-        await show_name.send(f"获取ID过程中出现错误：{e}")
+    current_name = await _call_api(show_name, "获取当前ID", turbo_api.show_maimai_name(bot_key), "请求数据不合法，请检查请求。")
+    await show_name.send(f"您当前的ID为：{current_name}")
 
 
 
 @set_ticket.handle()
+@command_deadline()
+@_reply_errors(set_ticket, "设置票")
 async def handle_set_ticket(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -464,43 +462,20 @@ API接口：POST /web/setTickets
 
     ticket_id = int(ticket_id_str)
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await set_ticket.send("您尚未绑定，请先绑定。")
         return
 
-    payload = {"ticketId": ticket_id}
-
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{Config.api_base_url}/web/setTickets', json=payload, headers=headers
-            )
-
-        if response.status_code == 200:
-            ticket_description = get_ticket_description(ticket_id)
-            await set_ticket.send(f"用户功能票成功锁定为：{ticket_description}")
-        elif response.status_code == 400:
-            await set_ticket.send("设置票失败，验证码验证失败或数据不合法。")
-        elif response.status_code == 401:
-            await set_ticket.send("请求的Token缺失或不合法，请检查权限。")
-        elif response.status_code == 403:
-            await set_ticket.send("权限不足，无法设置票。")
-        elif response.status_code == 410:
-            await set_ticket.send("该用户已被封禁，请联系管理员。")
-        elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await set_ticket.send(f"{error_message}")
-        else:
-            await set_ticket.send(f"设置票失败，HTTP响应状态码为{response.status_code}。")
-    except Exception as e:
-        await set_ticket.send(f"设置票过程中出现错误：{e}")
+    await _call_api(set_ticket, "设置票", turbo_api.set_tickets(bot_key, ticket_id), "设置票失败，验证码验证失败或数据不合法。")
+    ticket_description = get_ticket_description(ticket_id)
+    await set_ticket.send(f"用户功能票成功锁定为：{ticket_description}")
 
 
 
 @reset_ticket.handle()
+@command_deadline()
+@_reply_errors(reset_ticket, "取消票")
 async def handle_reset_ticket(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -523,38 +498,17 @@ API接口：POST /web/resetTickets
     
     qqid = str(event.get_user_id())
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await reset_ticket.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{Config.api_base_url}/web/resetTickets', headers=headers
-            )
-
-        if response.status_code == 200:
-            await reset_ticket.send("用户功能票取消锁定成功！")
-        elif response.status_code == 400:
-            await reset_ticket.send("取消票失败，验证码验证失败或数据不合法。")
-        elif response.status_code == 401:
-            await reset_ticket.send("请求的Token缺失或不合法，请检查权限。")
-        elif response.status_code == 403:
-            await reset_ticket.send("权限不足，无法取消票。")
-        elif response.status_code == 410:
-            await reset_ticket.send("该用户已被封禁，请联系管理员。")
-        elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await reset_ticket.send(f"{error_message}")
-        else:
-            await reset_ticket.send(f"取消票失败，HTTP响应状态码为{response.status_code}。")
-    except Exception as e:
-        await reset_ticket.send(f"取消票过程中出现错误：{e}")
+    await _call_api(reset_ticket, "取消票", turbo_api.reset_tickets(bot_key), "取消票失败，验证码验证失败或数据不合法。")
+    await reset_ticket.send("用户功能票取消锁定成功！")
 
 @show_ticket.handle()
+@command_deadline()
+@_reply_errors(show_ticket, "获取功能票信息")
 async def handle_show_ticket(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -580,65 +534,43 @@ API接口：GET /web/currentTickets
         return
 
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await show_ticket.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {
-        "Authorization": f"BotKey {bot_key}"
-    }
+    ticket_data = await _call_api(show_ticket, "获取功能票信息", turbo_api.current_tickets(bot_key), "请求数据不合法，请检查请求。")
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/currentTickets', headers=headers)
-
-            if response.status_code == 200:
-                ticket_data = response.json()
-
-                turbo_ticket = ticket_data.get("turboTicket", {})
-                is_enable = turbo_ticket.get("isEnable", False)
-                ticket_id = turbo_ticket.get("ticketId", 0)
-
-                if is_enable:
-                    ticket_description = get_ticket_description(ticket_id)
-                    message = f"已启用功能票锁定，当前锁定功能票为：{ticket_description}\n"
-                else:
-                    message = "未启用功能票锁定\n"
-
-                maimai_tickets = ticket_data.get("maimaiTickets", [])
-                available_tickets = []
-
-                for ticket in maimai_tickets:
-                    stock = ticket.get("stock", 0)
-                    if stock > 0:
-                        ticket_desc = get_ticket_description(ticket.get("ticketId", 0))
-                        available_tickets.append(f"{ticket_desc}：{stock}张")
-
-                if available_tickets:
-                    message += "\n账号内功能票库存：\n" + "\n".join(available_tickets)
-
-                await show_ticket.send(message)
-            elif response.status_code == 400:
-                await show_ticket.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_ticket.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_ticket.send("权限不足，无法获取功能票信息。")
-            elif response.status_code == 410:
-                await show_ticket.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_ticket.send(f"{error_message}")
-            else:
-                await show_ticket.send(f"获取功能票信息失败，HTTP响应状态码为：{response.status_code}。")
-    except Exception as e:
-        await show_ticket.send(f"获取功能票信息过程中出现错误：{e}")
+    turbo_ticket = ticket_data.get("turboTicket", {})
+    is_enable = turbo_ticket.get("isEnable", False)
+    ticket_id = turbo_ticket.get("ticketId", 0)
+
+    if is_enable:
+        ticket_description = get_ticket_description(ticket_id)
+        message = f"已启用功能票锁定，当前锁定功能票为：{ticket_description}\n"
+    else:
+        message = "未启用功能票锁定\n"
+
+    maimai_tickets = ticket_data.get("maimaiTickets", [])
+    available_tickets = []
+
+    for ticket in maimai_tickets:
+        stock = ticket.get("stock", 0)
+        if stock > 0:
+            ticket_desc = get_ticket_description(ticket.get("ticketId", 0))
+            available_tickets.append(f"{ticket_desc}：{stock}张")
+
+    if available_tickets:
+        message += "\n账号内功能票库存：\n" + "\n".join(available_tickets)
+
+    await show_ticket.send(message)
 
 
 @network.handle()
 @network_keyword.handle()
+@command_deadline()
+@_reply_errors(network, "获取数据")
 async def handle_network(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -667,69 +599,48 @@ API接口：GET /web/showServerRequests
         return
 
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     
     if not bot_key:
         await network.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {
-        "Authorization": f"BotKey {bot_key}"
-    }
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response_network = await client.get(f'{Config.api_base_url}/web/showServerRequests', headers=headers)
-
-            if response_network.status_code == 200:
-                network_data = response_network.json()
-
-                if network_data:
-                    all_requests_count = network_data.get("requestsCount", 0)
-                    exception_requests_count = network_data.get("exceptionRequestsCount", 0)
-                    zlib_skipped_requests_count = network_data.get("zlibSkippedRequestsCount", 0)
-                    retry_requests_count = network_data.get("retryRequestsCount", 0)
-                    panic_requests_count = network_data.get("panicRequestsCount", 0)
-                    exception_requests_rate = network_data.get("exceptionRequestsRate", 0)
-                    black_room_probability = 1 - (1 - exception_requests_rate / 100) ** 10
-
-                    message = (
-                        f"\n一小时内总请求数：{all_requests_count}\n"
-                        f"异常请求数：{exception_requests_count}\n"
-                        f"异常请求占比：{exception_requests_rate:.2f}%\n"
-                        f"Z-LIB 跳过数量：{zlib_skipped_requests_count}\n"
-                        f"重试请求数：{retry_requests_count}\n"
-                        f"失败请求数：{panic_requests_count}\n\n"
-                        f"10pc至少有一次小黑屋的预估概率：{black_room_probability:.2%}\n\n"
-                    )
-                    message += (
-                        "响应数据的「Z-LIB」压缩跳过率与请求重试次数可以反应当前网络情况。\n"
-                        "压缩跳过率超过「3%」时，可能会出现网络不稳定现象。\n"
-                        "请求重试率和失败率较高时，网络或服务器可能存在问题。\n"
-                        "小黑屋率为使用一小时异常率估算的数据，仅供参考。"
-                    )
-
-                    await network.send(message)
-                else:
-                    await network.send("获取网络数据失败。")
-            elif response_network.status_code == 400:
-                await network.send("请求数据不合法，请检查请求。")
-            elif response_network.status_code == 401:
-                await network.send("请求的Token缺失或不合法，请检查权限。")
-            elif response_network.status_code == 403:
-                await network.send("权限不足，无法获取网络数据。")
-            elif response_network.status_code == 410:
-                await network.send("该用户已被封禁，请联系管理员。")
-            elif response_network.status_code == 500:
-                error_message = response_network.json().get("message", "服务器内部错误")
-                await network.send(f"{error_message}")
-            else:
-                await network.send(f"获取数据失败，HTTP响应状态码为：{response_network.status_code}。")
-    except Exception as e:
-        await network.send(f"获取数据过程中出现错误：{e}")
+    network_data, stale_age = await _call_api(network, "获取网络数据", turbo_api.show_server_requests(bot_key), "请求数据不合法，请检查请求。")
+
+    if network_data:
+        all_requests_count = network_data.get("requestsCount", 0)
+        exception_requests_count = network_data.get("exceptionRequestsCount", 0)
+        zlib_skipped_requests_count = network_data.get("zlibSkippedRequestsCount", 0)
+        retry_requests_count = network_data.get("retryRequestsCount", 0)
+        panic_requests_count = network_data.get("panicRequestsCount", 0)
+        exception_requests_rate = network_data.get("exceptionRequestsRate", 0)
+        black_room_probability = 1 - (1 - exception_requests_rate / 100) ** 10
+
+        message = (
+            f"\n一小时内总请求数：{all_requests_count}\n"
+            f"异常请求数：{exception_requests_count}\n"
+            f"异常请求占比：{exception_requests_rate:.2f}%\n"
+            f"Z-LIB 跳过数量：{zlib_skipped_requests_count}\n"
+            f"重试请求数：{retry_requests_count}\n"
+            f"失败请求数：{panic_requests_count}\n\n"
+            f"10pc至少有一次小黑屋的预估概率：{black_room_probability:.2%}\n\n"
+        )
+        message += (
+            "响应数据的「Z-LIB」压缩跳过率与请求重试次数可以反应当前网络情况。\n"
+            "压缩跳过率超过「3%」时，可能会出现网络不稳定现象。\n"
+            "请求重试率和失败率较高时，网络或服务器可能存在问题。\n"
+            "小黑屋率为使用一小时异常率估算的数据，仅供参考。"
+        )
+        message += _stale_note(stale_age)
+
+        await network.send(message)
+    else:
+        await network.send("获取网络数据失败。")
 
 
 @show_permission.handle()
+@command_deadline()
+@_reply_errors(show_permission, "获取用户权限")
 async def handle_show_permission(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -753,81 +664,51 @@ API接口：
     
     qqid = str(event.get_user_id())
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await show_permission.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    # 两个接口互不依赖，并发请求
+    permission_text, turbo_permissions = await gather_requests(
+        turbo_api.show_permission(bot_key),
+        turbo_api.show_turbo_permission(bot_key),
+    )
+    if isinstance(permission_text, Exception):
+        await _finish_api_error(show_permission, "获取权限信息", permission_text, "请求数据不合法，请检查请求。")
+    response_data = UserPermission(permission=permission_text)
+    permission_level = response_data.get_permission_level()
+    message = f"用户权限级别：{permission_level}\n"
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/permission/showPermission', headers=headers)
-
-            if response.status_code == 200:
-                permission_text = response.text.strip().replace('"', '')
-                response_data = UserPermission(permission=permission_text)
-                permission_level = response_data.get_permission_level()
-                message = f"用户权限级别：{permission_level}\n"
-            elif response.status_code == 400:
-                await show_permission.send("请求数据不合法，请检查请求。")
-                return
-            elif response.status_code == 401:
-                await show_permission.send("请求的Token缺失或不合法，请检查权限。")
-                return
-            elif response.status_code == 403:
-                await show_permission.send("权限不足，无法获取权限信息。")
-                return
-            elif response.status_code == 410:
-                await show_permission.send("该用户已被封禁，请联系管理员。")
-                return
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_permission.send(f"{error_message}")
-                return
-            else:
-                await show_permission.send(f"获取权限信息失败，HTTP响应状态码为 {response.status_code}。")
-                return
-
-            response_turbo = await client.get(f'{Config.api_base_url}/web/showTurboPermission', headers=headers)
-
-            if response_turbo.status_code == 200:
-                turbo_permissions = response_turbo.json()
-                if turbo_permissions:
-                    granted_permissions = []
-                    for permission in turbo_permissions:
-                        description = permission.get("permissionDescription", "未知权限")
-                        is_granted = permission.get("isGranted", False)
-                        if is_granted:
-                            description = html.unescape(description)
-                            granted_permissions.append(description)
-
-                    if granted_permissions:
-                        message += "\n已授予的详细权限：\n" + "\n".join(granted_permissions)
-                    else:
-                        message += "\n未授予任何详细权限。"
-                else:
-                    message += "\n无法获取详细权限信息。"
-            elif response_turbo.status_code == 400:
-                message += "\n请求数据不合法，请检查请求。"
-            elif response_turbo.status_code == 401:
-                message += "\n请求的Token缺失或不合法，请检查权限。"
-            elif response_turbo.status_code == 403:
-                message += "\n权限不足，无法获取详细Turbo权限信息。"
-            elif response_turbo.status_code == 410:
-                message += "\n该用户已被封禁，请联系管理员。"
-            elif response_turbo.status_code == 500:
-                error_message = response_turbo.json().get("message", "服务器内部错误")
-                message += f"\n{error_message}"
+        if isinstance(turbo_permissions, Exception):
+            raise turbo_permissions
+        if turbo_permissions:
+            granted_permissions = []
+            for permission in turbo_permissions:
+                description = permission.get("permissionDescription", "未知权限")
+                is_granted = permission.get("isGranted", False)
+                if is_granted:
+                    description = html.unescape(description)
+                    granted_permissions.append(description)
+
+            if granted_permissions:
+                message += "\n已授予的详细权限：\n" + "\n".join(granted_permissions)
             else:
-                message += f"\n获取详细Turbo权限失败，HTTP响应状态码为 {response_turbo.status_code}。"
-
-            await show_permission.send(message)
-
+                message += "\n未授予任何详细权限。"
+        else:
+            message += "\n无法获取详细权限信息。"
+    except TurboApiError as e:
+        message += "\n" + e.describe("获取详细Turbo权限", "请求数据不合法，请检查请求。")
     except Exception as e:
         await show_permission.send(f"获取用户权限过程中出现错误：{e}")
+        return
+
+    await show_permission.send(message)
 
 @show_friends.handle()
+@command_deadline()
+@_reply_errors(show_friends, "获取好友列表")
 async def handle_show_friends(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -857,7 +738,7 @@ API接口：GET /web/showFriends
         return
 
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     
     if page_str.isdigit():
         page = int(page_str)
@@ -868,53 +749,32 @@ API接口：GET /web/showFriends
         await show_friends.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    friends_data = await _call_api(show_friends, "获取好友列表", turbo_api.show_friends(bot_key, page), "请求数据不合法，请检查请求。")
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showFriends', params={"page": page}, headers=headers)
-
-            if response.status_code == 200:
-                friends_data = response.json()
-
-                content = friends_data.get("content", [])
-                total_elements = friends_data.get("totalElements", 0)
-                total_pages = friends_data.get("totalPages", 0)
-
-                if not content:
-                    await show_friends.send("您目前还没有添加好友。")
-                    return
-
-                friend_names = [friend["turboName"] for friend in content]
-                friend_list_message = "好友列表：\n" + "\n".join(friend_names)
-
-                message = (
-                    f"{friend_list_message}\n\n"
-                    f"共 {total_elements} 位好友，当前 {page}/{total_pages} 页。"
-                )
-
-                if total_pages > 1:
-                    message += "\n可以在命令后添加页数查看对应页数的好友。"
-
-                await show_friends.send(message)
-
-            elif response.status_code == 400:
-                await show_friends.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_friends.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_friends.send("权限不足，无法获取好友列表。")
-            elif response.status_code == 410:
-                await show_friends.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_friends.send(f"{error_message}")
-            else:
-                await show_friends.send(f"获取好友列表失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_friends.send(f"获取好友列表过程中出现错误：{e}")
+    content = friends_data.get("content", [])
+    total_elements = friends_data.get("totalElements", 0)
+    total_pages = friends_data.get("totalPages", 0)
+
+    if not content:
+        await show_friends.send("您目前还没有添加好友。")
+        return
+
+    friend_names = [friend["turboName"] for friend in content]
+    friend_list_message = "好友列表：\n" + "\n".join(friend_names)
+
+    message = (
+        f"{friend_list_message}\n\n"
+        f"共 {total_elements} 位好友，当前 {page}/{total_pages} 页。"
+    )
+
+    if total_pages > 1:
+        message += "\n可以在命令后添加页数查看对应页数的好友。"
+
+    await show_friends.send(message)
 
 @show_friend_requests.handle()
+@command_deadline()
+@_reply_errors(show_friend_requests, "获取好友请求")
 async def handle_show_friend_requests(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -940,57 +800,37 @@ API接口：GET /web/showFriendRequests
         return
 
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await show_friend_requests.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    friend_requests = await _call_api(
+        show_friend_requests, "获取好友请求", turbo_api.show_friend_requests(bot_key), "请求数据不合法，请检查请求。"
+    )
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showFriendRequests', headers=headers)
-
-            if response.status_code == 200:
-                friend_requests = response.json()
-
-                if not friend_requests:
-                    await show_friend_requests.send("当前没有待处理的好友请求。")
-                    return
-
-                requests_message = "好友请求列表：\n"
-                for request in friend_requests:
-                    turbo_name = request.get("turboName", "未知用户")
-                    request_time = request.get("requestTime", "")
-
-                    try:
-                        formatted_time = datetime.strptime(request_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
-                    except ValueError:
-                        formatted_time = request_time
-
-                    requests_message += f"{turbo_name} - 请求时间：{formatted_time}\n"
-
-                await show_friend_requests.send(requests_message)
-
-            elif response.status_code == 400:
-                await show_friend_requests.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_friend_requests.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_friend_requests.send("权限不足，无法获取好友请求。")
-            elif response.status_code == 410:
-                await show_friend_requests.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_friend_requests.send(f"{error_message}")
-            else:
-                await show_friend_requests.send(f"获取好友请求失败，HTTP响应状态码为 {response.status_code}。")
+    if not friend_requests:
+        await show_friend_requests.send("当前没有待处理的好友请求。")
+        return
 
-    except Exception as e:
-        await show_friend_requests.send(f"获取好友请求过程中出现错误：{e}")
+    requests_message = "好友请求列表：\n"
+    for request in friend_requests:
+        turbo_name = request.get("turboName", "未知用户")
+        request_time = request.get("requestTime", "")
+
+        try:
+            formatted_time = datetime.strptime(request_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
+        except ValueError:
+            formatted_time = request_time
+
+        requests_message += f"{turbo_name} - 请求时间：{formatted_time}\n"
+
+    await show_friend_requests.send(requests_message)
 
 @add_friend.handle()
+@command_deadline()
+@_reply_errors(add_friend, "添加好友")
 async def handle_add_friend(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1025,38 +865,18 @@ API接口：POST /web/addFriend
         await add_friend.send("请提供要添加好友的名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await add_friend.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/addFriend', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await add_friend.send(f"好友请求已发送给：{turbo_name}")
-            elif response.status_code == 400:
-                await add_friend.send("请求数据不合法，请检查输入的好友名称。")
-            elif response.status_code == 401:
-                await add_friend.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await add_friend.send("权限不足，无法添加好友。")
-            elif response.status_code == 410:
-                await add_friend.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await add_friend.send(f"{error_message}")
-            else:
-                await add_friend.send(f"添加好友失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await add_friend.send(f"添加好友过程中出现错误：{e}")
+    await _call_api(add_friend, "添加好友", turbo_api.add_friend(bot_key, turbo_name), "请求数据不合法，请检查输入的好友名称。")
+    await add_friend.send(f"好友请求已发送给：{turbo_name}")
 
 @accept_friend.handle()
+@command_deadline()
+@_reply_errors(accept_friend, "接受好友请求")
 async def handle_accept_friend(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1091,38 +911,18 @@ API接口：POST /web/acceptFriend
         await accept_friend.send("请提供要接受好友请求的名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await accept_friend.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/acceptFriend', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await accept_friend.send(f"您已接受 {turbo_name} 的好友请求。")
-            elif response.status_code == 400:
-                await accept_friend.send("请求数据不合法，请检查输入的好友名称。")
-            elif response.status_code == 401:
-                await accept_friend.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await accept_friend.send("权限不足，无法接受好友请求。")
-            elif response.status_code == 410:
-                await accept_friend.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await accept_friend.send(f"{error_message}")
-            else:
-                await accept_friend.send(f"接受好友请求失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await accept_friend.send(f"接受好友请求过程中出现错误：{e}")
+    await _call_api(accept_friend, "接受好友请求", turbo_api.accept_friend(bot_key, turbo_name), "请求数据不合法，请检查输入的好友名称。")
+    await accept_friend.send(f"您已接受 {turbo_name} 的好友请求。")
 
 @deny_friend.handle()
+@command_deadline()
+@_reply_errors(deny_friend, "拒绝好友请求")
 async def handle_deny_friend(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1157,38 +957,18 @@ API接口：POST /web/denyFriend
         await deny_friend.send("请提供要拒绝的好友请求的名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await deny_friend.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/denyFriend', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await deny_friend.send(f"您已拒绝 {turbo_name} 的好友请求。")
-            elif response.status_code == 400:
-                await deny_friend.send("请求数据不合法，请检查输入的好友名称。")
-            elif response.status_code == 401:
-                await deny_friend.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await deny_friend.send("权限不足，无法拒绝好友请求。")
-            elif response.status_code == 410:
-                await deny_friend.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await deny_friend.send(f"{error_message}")
-            else:
-                await deny_friend.send(f"拒绝好友请求失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await deny_friend.send(f"拒绝好友请求过程中出现错误：{e}")
+    await _call_api(deny_friend, "拒绝好友请求", turbo_api.deny_friend(bot_key, turbo_name), "请求数据不合法，请检查输入的好友名称。")
+    await deny_friend.send(f"您已拒绝 {turbo_name} 的好友请求。")
 
 @remove_friend.handle()
+@command_deadline()
+@_reply_errors(remove_friend, "删除好友")
 async def handle_remove_friend(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1223,38 +1003,18 @@ API接口：POST /web/removeFriend
         await remove_friend.send("请提供要删除的好友名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await remove_friend.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/removeFriend', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await remove_friend.send(f"您已成功删除好友：{turbo_name}")
-            elif response.status_code == 400:
-                await remove_friend.send("请求数据不合法，请检查输入的好友名称。")
-            elif response.status_code == 401:
-                await remove_friend.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await remove_friend.send("权限不足，无法删除好友。")
-            elif response.status_code == 410:
-                await remove_friend.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await remove_friend.send(f"{error_message}")
-            else:
-                await remove_friend.send(f"删除好友失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await remove_friend.send(f"删除好友过程中出现错误：{e}")
+    await _call_api(remove_friend, "删除好友", turbo_api.remove_friend(bot_key, turbo_name), "请求数据不合法，请检查输入的好友名称。")
+    await remove_friend.send(f"您已成功删除好友：{turbo_name}")
 
 @arcade_info_detail.handle()
+@command_deadline()
+@_reply_errors(arcade_info_detail, "获取机厅信息")
 async def handle_arcade_info_detail(event: MessageEvent, arg: Message = CommandArg()):
     arcade_name = str(arg).strip()
     
@@ -1283,6 +1043,8 @@ API接口：GET /web/arcadeInfoDetail
 
 
 @arcade_wanji.handle()
+@command_deadline()
+@_reply_errors(arcade_wanji, "获取机厅信息")
 async def handle_arcade_wanji(event: MessageEvent):
     await _query_arcade(event, "w", arcade_wanji)
 
@@ -1290,82 +1052,62 @@ async def handle_arcade_wanji(event: MessageEvent):
 async def _query_arcade(event: MessageEvent, arcade_name: str, matcher):
     """机厅查询核心逻辑"""
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await matcher.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    params = {"arcadeName": arcade_name}
+    arcade_prefetch.record(arcade_name, bot_key)
+    arcade_data, stale_age = await _call_api(
+        matcher, "获取机厅信息", turbo_api.arcade_info_detail(bot_key, arcade_name), "请求数据不合法，请检查机厅名称。"
+    )
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/arcadeInfoDetail', params=params, headers=headers)
-
-            if response.status_code == 200:
-                arcade_data = response.json()
-
-                arcade_info = arcade_data.get("arcadeInfo", {})
-                arcade_name_display = arcade_info.get("arcadeName", "未知机厅")
-                
-                # 修正错误的店铺名称
-                if arcade_name_display == "黑龙江哈尔滨牡丹江万达店大玩家":
-                    arcade_name_display = "牡丹江-万达大玩家 舞萌状态"
-                
-                thirty_minutes_player = arcade_data.get("thirtyMinutesPlayer", 0)
-                one_hour_player = arcade_data.get("oneHourPlayer", 0)
-                two_hours_player = arcade_data.get("twoHoursPlayer", 0)
-                thirty_minutes_play_count = arcade_data.get("thirtyMinutesPlayCount", 0)
-                one_hour_play_count = arcade_data.get("oneHourPlayCount", 0)
-                two_hours_play_count = arcade_data.get("twoHoursPlayCount", 0)
-
-                player_list = arcade_data.get("playerList", [])
-                recent_players = [player.get("maimaiName", "未知玩家") for player in player_list[:6]]
-
-                arcade_requested = arcade_info.get("arcadeRequested", 0)
-                arcade_cached_request = arcade_info.get("arcadeCachedRequest", 0)
-                arcade_fixed_request = arcade_info.get("arcadeFixedRequest", 0)
-                arcade_cached_hit_rate = arcade_info.get("arcadeCachedHitRate", 0)
-
-                cache_hit_rate = (arcade_cached_hit_rate / 100) if arcade_cached_hit_rate > 0 else 0
-                error_fix_rate = (arcade_fixed_request / arcade_requested * 100) if arcade_requested > 0 else 0
-
-                message = (
-                    f"{arcade_name_display}\n\n"
-                    f"30 分钟内有 {thirty_minutes_player} 名玩家，共 {thirty_minutes_play_count} pc\n"
-                    f"1 小时内有 {one_hour_player} 名玩家，共 {one_hour_play_count} pc\n"
-                    f"2 小时内有 {two_hours_player} 名玩家，共 {two_hours_play_count} pc\n\n"
-                )
-
-                if recent_players:
-                    message += "最近游玩的 6 名玩家：\n" + "\n".join(recent_players) + "\n\n"
-                else:
-                    message += "最近游玩的 6 名玩家：无\n\n"
-
-                message += (
-                    f"在 {arcade_requested} 次网络请求中，缓存击中 {arcade_cached_request} 次，"
-                    f"修复 {arcade_fixed_request} 次错误，缓存击中率 {cache_hit_rate:.2%}，"
-                    f"缓外错误率 {error_fix_rate:.2%}"
-                )
-
-                await matcher.send(message)
-
-            elif response.status_code == 400:
-                await matcher.send("请求数据不合法，请检查机厅名称。")
-            elif response.status_code == 401:
-                await matcher.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await matcher.send("权限不足，无法获取机厅信息。")
-            elif response.status_code == 410:
-                await matcher.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await matcher.send(f"{error_message}")
-            else:
-                await matcher.send(f"获取机厅信息失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await matcher.send(f"获取机厅信息过程中出现错误：{e}")
+    arcade_info = arcade_data.get("arcadeInfo", {})
+    arcade_name_display = arcade_info.get("arcadeName", "未知机厅")
+
+    # 修正错误的店铺名称
+    if arcade_name_display == "黑龙江哈尔滨牡丹江万达店大玩家":
+        arcade_name_display = "牡丹江-万达大玩家 舞萌状态"
+
+    thirty_minutes_player = arcade_data.get("thirtyMinutesPlayer", 0)
+    one_hour_player = arcade_data.get("oneHourPlayer", 0)
+    two_hours_player = arcade_data.get("twoHoursPlayer", 0)
+    thirty_minutes_play_count = arcade_data.get("thirtyMinutesPlayCount", 0)
+    one_hour_play_count = arcade_data.get("oneHourPlayCount", 0)
+    two_hours_play_count = arcade_data.get("twoHoursPlayCount", 0)
+
+    player_list = arcade_data.get("playerList", [])
+    recent_players = [player.get("maimaiName", "未知玩家") for player in player_list[:6]]
+
+    arcade_requested = arcade_info.get("arcadeRequested", 0)
+    arcade_cached_request = arcade_info.get("arcadeCachedRequest", 0)
+    arcade_fixed_request = arcade_info.get("arcadeFixedRequest", 0)
+    arcade_cached_hit_rate = arcade_info.get("arcadeCachedHitRate", 0)
+
+    cache_hit_rate = (arcade_cached_hit_rate / 100) if arcade_cached_hit_rate > 0 else 0
+    error_fix_rate = (arcade_fixed_request / arcade_requested * 100) if arcade_requested > 0 else 0
+
+    message = (
+        f"{arcade_name_display}\n\n"
+        f"30 分钟内有 {thirty_minutes_player} 名玩家，共 {thirty_minutes_play_count} pc\n"
+        f"1 小时内有 {one_hour_player} 名玩家，共 {one_hour_play_count} pc\n"
+        f"2 小时内有 {two_hours_player} 名玩家，共 {two_hours_play_count} pc\n\n"
+    )
+
+    if recent_players:
+        message += "最近游玩的 6 名玩家：\n" + "\n".join(recent_players) + "\n\n"
+    else:
+        message += "最近游玩的 6 名玩家：无\n\n"
+
+    message += (
+        f"在 {arcade_requested} 次网络请求中，缓存击中 {arcade_cached_request} 次，"
+        f"修复 {arcade_fixed_request} 次错误，缓存击中率 {cache_hit_rate:.2%}，"
+        f"缓外错误率 {error_fix_rate:.2%}"
+    )
+
+    message += _stale_note(stale_age)
+    await matcher.send(message)
 
 
 def get_ticket_description(ticket_id: int) -> str:
@@ -1398,6 +1140,8 @@ def get_ticket_description(ticket_id: int) -> str:
 # === 新增功能处理函数 ===
 
 @show_user.handle()
+@command_deadline()
+@_reply_errors(show_user, "获取用户信息")
 async def handle_show_user(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1426,59 +1170,41 @@ API接口：GET /web/user
         return
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await show_user.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    user_data = await _call_api(show_user, "获取用户信息", turbo_api.user(bot_key))
+    turbo_name = user_data.get("turboName", "未知")
+    user_id = user_data.get("userId", "未知")
+    create_time = user_data.get("createTime", "")
+    last_login_time = user_data.get("lastLoginTime", "")
+    permission = user_data.get("permission", "未知")
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/user', headers=headers)
-
-            if response.status_code == 200:
-                user_data = response.json()
-                turbo_name = user_data.get("turboName", "未知")
-                user_id = user_data.get("userId", "未知")
-                create_time = user_data.get("createTime", "")
-                last_login_time = user_data.get("lastLoginTime", "")
-                permission = user_data.get("permission", "未知")
-
-                try:
-                    if create_time:
-                        create_time = datetime.strptime(create_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
-                    if last_login_time:
-                        last_login_time = datetime.strptime(last_login_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
-                except ValueError:
-                    pass
-
-                message = (
-                    f"用户信息\n"
-                    f"Turbo名称：{turbo_name}\n"
-                    f"用户ID：{user_id}\n"
-                    f"创建时间：{create_time}\n"
-                    f"最后登录：{last_login_time}\n"
-                    f"权限等级：{permission}"
-                )
-                await show_user.send(message)
-            elif response.status_code == 401:
-                await show_user.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_user.send("权限不足，无法获取用户信息。")
-            elif response.status_code == 410:
-                await show_user.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_user.send(f"{error_message}")
-            else:
-                await show_user.send(f"获取用户信息失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_user.send(f"获取用户信息过程中出现错误：{e}")
+        if create_time:
+            create_time = datetime.strptime(create_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
+        if last_login_time:
+            last_login_time = datetime.strptime(last_login_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
+    except ValueError:
+        pass
+
+    message = (
+        f"用户信息\n"
+        f"Turbo名称：{turbo_name}\n"
+        f"用户ID：{user_id}\n"
+        f"创建时间：{create_time}\n"
+        f"最后登录：{last_login_time}\n"
+        f"权限等级：{permission}"
+    )
+    await show_user.send(message)
 
 
 @show_network_status.handle()
+@command_deadline()
+@_reply_errors(show_network_status, "获取机厅状态")
 async def handle_show_network_status(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1513,61 +1239,42 @@ API接口：GET /web/showNetworkStatus
         await show_network_status.send("请提供要查询的机厅名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await show_network_status.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    params = {"arcadeName": arcade_name}
+    status_data = await _call_api(
+        show_network_status, "获取机厅状态", turbo_api.show_network_status(bot_key, arcade_name), "请求数据不合法，请检查机厅名称。"
+    )
+    arcade_info = status_data.get("arcadeInfo", {})
+    arcade_name_display = arcade_info.get("arcadeName", arcade_name)
+    network_status = status_data.get("networkStatus", "未知")
+    last_update = status_data.get("lastUpdate", "")
+    request_count = status_data.get("requestCount", 0)
+    error_count = status_data.get("errorCount", 0)
+    error_rate = status_data.get("errorRate", 0)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showNetworkStatus', params=params, headers=headers)
-
-            if response.status_code == 200:
-                status_data = response.json()
-                arcade_info = status_data.get("arcadeInfo", {})
-                arcade_name_display = arcade_info.get("arcadeName", arcade_name)
-                network_status = status_data.get("networkStatus", "未知")
-                last_update = status_data.get("lastUpdate", "")
-                request_count = status_data.get("requestCount", 0)
-                error_count = status_data.get("errorCount", 0)
-                error_rate = status_data.get("errorRate", 0)
-
-                try:
-                    if last_update:
-                        last_update = datetime.strptime(last_update, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
-                except ValueError:
-                    pass
-
-                message = (
-                    f"机厅：{arcade_name_display}\n"
-                    f"网络状态：{network_status}\n"
-                    f"最后更新：{last_update}\n"
-                    f"请求数：{request_count}\n"
-                    f"错误数：{error_count}\n"
-                    f"错误率：{error_rate:.2f}%"
-                )
-                await show_network_status.send(message)
-            elif response.status_code == 400:
-                await show_network_status.send("请求数据不合法，请检查机厅名称。")
-            elif response.status_code == 401:
-                await show_network_status.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_network_status.send("权限不足，无法获取机厅状态。")
-            elif response.status_code == 410:
-                await show_network_status.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_network_status.send(f"{error_message}")
-            else:
-                await show_network_status.send(f"获取机厅状态失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_network_status.send(f"获取机厅状态过程中出现错误：{e}")
+        if last_update:
+            last_update = datetime.strptime(last_update, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y/%m/%d %H:%M:%S")
+    except ValueError:
+        pass
+
+    message = (
+        f"机厅：{arcade_name_display}\n"
+        f"网络状态：{network_status}\n"
+        f"最后更新：{last_update}\n"
+        f"请求数：{request_count}\n"
+        f"错误数：{error_count}\n"
+        f"错误率：{error_rate:.2f}%"
+    )
+    await show_network_status.send(message)
 
 
 @show_records.handle()
+@command_deadline()
+@_reply_errors(show_records, "获取历史记录")
 async def handle_show_records(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1597,7 +1304,7 @@ API接口：GET /web/records
         return
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if page_str.isdigit():
         page = int(page_str)
@@ -1608,61 +1315,41 @@ API接口：GET /web/records
         await show_records.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    records_data = await _call_api(show_records, "获取历史记录", turbo_api.records(bot_key, page), "请求数据不合法，请检查请求。")
+    content = records_data.get("content", [])
+    total_elements = records_data.get("totalElements", 0)
+    total_pages = records_data.get("totalPages", 0)
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/records', params={"page": page}, headers=headers)
-
-            if response.status_code == 200:
-                records_data = response.json()
-                content = records_data.get("content", [])
-                total_elements = records_data.get("totalElements", 0)
-                total_pages = records_data.get("totalPages", 0)
-
-                if not content:
-                    await show_records.send("暂无历史记录。")
-                    return
-
-                message = "历史记录：\n"
-                for record in content:
-                    record_time = record.get("playTime", "")
-                    arcade_name = record.get("arcadeName", "未知机厅")
-                    song_name = record.get("songName", "未知歌曲")
-                    score = record.get("score", 0)
-                    difficulty = record.get("difficulty", "未知")
-
-                    try:
-                        if record_time:
-                            record_time = datetime.strptime(record_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%m/%d %H:%M")
-                    except ValueError:
-                        pass
-
-                    message += f"{record_time} | {song_name} | {difficulty} | {score}\n"
-
-                message += f"\n共 {total_elements} 条记录，当前 {page}/{total_pages} 页"
-                if total_pages > 1:
-                    message += "\n可以在命令后添加页数查看对应页数的记录。"
-
-                await show_records.send(message)
-            elif response.status_code == 400:
-                await show_records.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_records.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_records.send("权限不足，无法获取历史记录。")
-            elif response.status_code == 410:
-                await show_records.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_records.send(f"{error_message}")
-            else:
-                await show_records.send(f"获取历史记录失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_records.send(f"获取历史记录过程中出现错误：{e}")
+    if not content:
+        await show_records.send("暂无历史记录。")
+        return
+
+    message = "历史记录：\n"
+    for record in content:
+        record_time = record.get("playTime", "")
+        arcade_name = record.get("arcadeName", "未知机厅")
+        song_name = record.get("songName", "未知歌曲")
+        score = record.get("score", 0)
+        difficulty = record.get("difficulty", "未知")
+
+        try:
+            if record_time:
+                record_time = datetime.strptime(record_time, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%m/%d %H:%M")
+        except ValueError:
+            pass
+
+        message += f"{record_time} | {song_name} | {difficulty} | {score}\n"
+
+    message += f"\n共 {total_elements} 条记录，当前 {page}/{total_pages} 页"
+    if total_pages > 1:
+        message += "\n可以在命令后添加页数查看对应页数的记录。"
+
+    await show_records.send(message)
 
 
 @show_user_settings.handle()
+@command_deadline()
+@_reply_errors(show_user_settings, "获取用户设置")
 async def handle_show_user_settings(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1692,42 +1379,24 @@ API接口：GET /web/showUserSettings
         return
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await show_user_settings.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showUserSettings', headers=headers)
-
-            if response.status_code == 200:
-                settings_data = response.json()
-                message = "用户设置：\n"
-                for key, value in settings_data.items():
-                    setting_name = get_setting_name(key)
-                    setting_value = "开启" if value is True else "关闭" if value is False else str(value)
-                    message += f"{setting_name}：{setting_value}\n"
-                await show_user_settings.send(message)
-            elif response.status_code == 401:
-                await show_user_settings.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_user_settings.send("权限不足，无法获取用户设置。")
-            elif response.status_code == 410:
-                await show_user_settings.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_user_settings.send(f"{error_message}")
-            else:
-                await show_user_settings.send(f"获取用户设置失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_user_settings.send(f"获取用户设置过程中出现错误：{e}")
+    settings_data = await _call_api(show_user_settings, "获取用户设置", turbo_api.show_user_settings(bot_key))
+    message = "用户设置：\n"
+    for key, value in settings_data.items():
+        setting_name = get_setting_name(key)
+        setting_value = "开启" if value is True else "关闭" if value is False else str(value)
+        message += f"{setting_name}：{setting_value}\n"
+    await show_user_settings.send(message)
 
 
 @set_user_settings.handle()
+@command_deadline()
+@_reply_errors(set_user_settings, "修改设置")
 async def handle_set_user_settings(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1773,13 +1442,11 @@ API接口：POST /web/setUserSettings
     setting_key = args_list[0]
     setting_value = args_list[1]
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await set_user_settings.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
     # 尝试将值转换为布尔类型
     if setting_value.lower() in ['true', '开启', '是', 'on', '1']:
         setting_value = True
@@ -1788,30 +1455,12 @@ API接口：POST /web/setUserSettings
 
     payload = {setting_key: setting_value}
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/setUserSettings', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await set_user_settings.send("设置修改成功！")
-            elif response.status_code == 400:
-                await set_user_settings.send("请求数据不合法，请检查设置名和值。")
-            elif response.status_code == 401:
-                await set_user_settings.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await set_user_settings.send("权限不足，无法修改设置。")
-            elif response.status_code == 410:
-                await set_user_settings.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await set_user_settings.send(f"{error_message}")
-            else:
-                await set_user_settings.send(f"修改设置失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await set_user_settings.send(f"修改设置过程中出现错误：{e}")
+    await _call_api(set_user_settings, "修改设置", turbo_api.set_user_settings(bot_key, payload), "请求数据不合法，请检查设置名和值。")
+    await set_user_settings.send("设置修改成功！")
 
 
 @set_avatar.handle()
+@_reply_errors(set_avatar, "设置头像")
 async def handle_set_avatar_start(event: MessageEvent, state: T_State, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1836,7 +1485,7 @@ API接口：POST /web/setAvatar
         await set_avatar.finish(help_text)
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await set_avatar.finish("您尚未绑定，请先绑定。")
@@ -1845,6 +1494,8 @@ API接口：POST /web/setAvatar
 
 
 @set_avatar.got("avatar_image", prompt="请发送您要上传的图片（超时时间60秒）")
+@command_deadline(90.0)  # 下载图片 30 秒 + 上传 60 秒
+@_reply_errors(set_avatar, "设置头像")
 async def handle_set_avatar_receive(event: MessageEvent, state: T_State):
     """
     @Author: TurboServlet
@@ -1866,47 +1517,24 @@ async def handle_set_avatar_receive(event: MessageEvent, state: T_State):
     if not image_url:
         await set_avatar.reject("未检测到图片，请发送一张图片。")
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
     try:
         # 下载图片
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            img_response = await client.get(image_url)
-            if img_response.status_code != 200:
-                await set_avatar.finish("图片下载失败，请重试。")
-
-            image_data = img_response.content
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-
-            # 上传头像
-            payload = {"avatarBase64": image_base64}
-            response = await client.post(
-                f'{Config.api_base_url}/web/setAvatar',
-                json=payload,
-                headers=headers,
-                timeout=60.0
-            )
-
-            if response.status_code == 200:
-                await set_avatar.finish("头像设置成功！")
-            elif response.status_code == 400:
-                await set_avatar.finish("请求数据不合法，请检查图片格式。")
-            elif response.status_code == 401:
-                await set_avatar.finish("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await set_avatar.finish("权限不足，无法设置头像。")
-            elif response.status_code == 410:
-                await set_avatar.finish("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await set_avatar.finish(f"{error_message}")
-            else:
-                await set_avatar.finish(f"设置头像失败，HTTP响应状态码为 {response.status_code}。")
+        img_response = await get_http_client().get(image_url, timeout=30.0)
     except Exception as e:
         await set_avatar.finish(f"设置头像过程中出现错误：{e}")
+    if img_response.status_code != 200:
+        await set_avatar.finish("图片下载失败，请重试。")
+
+    image_base64 = base64.b64encode(img_response.content).decode('utf-8')
+
+    # 上传头像
+    await _call_api(set_avatar, "设置头像", turbo_api.set_avatar(bot_key, image_base64), "请求数据不合法，请检查图片格式。")
+    await set_avatar.finish("头像设置成功！")
 
 
 @reset_avatar.handle()
+@command_deadline()
+@_reply_errors(reset_avatar, "重置头像")
 async def handle_reset_avatar(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -1928,38 +1556,19 @@ API接口：POST /web/resetAvatar
         return
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if not bot_key:
         await reset_avatar.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/resetAvatar', headers=headers)
-
-            if response.status_code == 200:
-                await reset_avatar.send("头像重置成功！")
-            elif response.status_code == 400:
-                await reset_avatar.send("重置头像失败，请求数据不合法。")
-            elif response.status_code == 401:
-                await reset_avatar.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await reset_avatar.send("权限不足，无法重置头像。")
-            elif response.status_code == 410:
-                await reset_avatar.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await reset_avatar.send(f"{error_message}")
-            else:
-                await reset_avatar.send(f"重置头像失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await reset_avatar.send(f"重置头像过程中出现错误：{e}")
+    await _call_api(reset_avatar, "重置头像", turbo_api.reset_avatar(bot_key), "重置头像失败，请求数据不合法。")
+    await reset_avatar.send("头像重置成功！")
 
 
 @set_friend_search_policy.handle()
+@command_deadline()
+@_reply_errors(set_friend_search_policy, "设置好友查找策略")
 async def handle_set_friend_search_policy(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -2002,39 +1611,21 @@ API接口：POST /web/setFriendSearchPolicy
         await set_friend_search_policy.send("无效的策略值，请使用：开启 或 关闭")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await set_friend_search_policy.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"allowSearch": policy}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/setFriendSearchPolicy', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                status = "开启" if policy else "关闭"
-                await set_friend_search_policy.send(f"好友查找策略已设置为：{status}")
-            elif response.status_code == 400:
-                await set_friend_search_policy.send("请求数据不合法，请检查输入。")
-            elif response.status_code == 401:
-                await set_friend_search_policy.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await set_friend_search_policy.send("权限不足，无法设置好友查找策略。")
-            elif response.status_code == 410:
-                await set_friend_search_policy.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await set_friend_search_policy.send(f"{error_message}")
-            else:
-                await set_friend_search_policy.send(f"设置失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await set_friend_search_policy.send(f"设置好友查找策略过程中出现错误：{e}")
+    await _call_api(
+        set_friend_search_policy, "设置好友查找策略", turbo_api.set_friend_search_policy(bot_key, policy), "请求数据不合法，请检查输入。"
+    )
+    status = "开启" if policy else "关闭"
+    await set_friend_search_policy.send(f"好友查找策略已设置为：{status}")
 
 
 @show_rivals.handle()
+@command_deadline()
+@_reply_errors(show_rivals, "获取对手列表")
 async def handle_show_rivals(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -2064,7 +1655,7 @@ API接口：GET /web/showRivals
         return
     
     qqid = str(event.get_user_id())
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
 
     if page_str.isdigit():
         page = int(page_str)
@@ -2075,52 +1666,32 @@ API接口：GET /web/showRivals
         await show_rivals.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
+    rivals_data = await _call_api(show_rivals, "获取对手列表", turbo_api.show_rivals(bot_key, page), "请求数据不合法，请检查请求。")
+    content = rivals_data.get("content", [])
+    total_elements = rivals_data.get("totalElements", 0)
+    total_pages = rivals_data.get("totalPages", 0)
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f'{Config.api_base_url}/web/showRivals', params={"page": page}, headers=headers)
-
-            if response.status_code == 200:
-                rivals_data = response.json()
-                content = rivals_data.get("content", [])
-                total_elements = rivals_data.get("totalElements", 0)
-                total_pages = rivals_data.get("totalPages", 0)
-
-                if not content:
-                    await show_rivals.send("您目前还没有添加对手。")
-                    return
-
-                rival_names = [rival.get("turboName", "未知") for rival in content]
-                rival_list_message = "对手列表：\n" + "\n".join(rival_names)
-
-                message = (
-                    f"{rival_list_message}\n\n"
-                    f"共 {total_elements} 位对手，当前 {page}/{total_pages} 页。"
-                )
-
-                if total_pages > 1:
-                    message += "\n可以在命令后添加页数查看对应页数的对手。"
-
-                await show_rivals.send(message)
-            elif response.status_code == 400:
-                await show_rivals.send("请求数据不合法，请检查请求。")
-            elif response.status_code == 401:
-                await show_rivals.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await show_rivals.send("权限不足，无法获取对手列表。")
-            elif response.status_code == 410:
-                await show_rivals.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await show_rivals.send(f"{error_message}")
-            else:
-                await show_rivals.send(f"获取对手列表失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await show_rivals.send(f"获取对手列表过程中出现错误：{e}")
+    if not content:
+        await show_rivals.send("您目前还没有添加对手。")
+        return
+
+    rival_names = [rival.get("turboName", "未知") for rival in content]
+    rival_list_message = "对手列表：\n" + "\n".join(rival_names)
+
+    message = (
+        f"{rival_list_message}\n\n"
+        f"共 {total_elements} 位对手，当前 {page}/{total_pages} 页。"
+    )
+
+    if total_pages > 1:
+        message += "\n可以在命令后添加页数查看对应页数的对手。"
+
+    await show_rivals.send(message)
 
 
 @add_rival.handle()
+@command_deadline()
+@_reply_errors(add_rival, "添加对手")
 async def handle_add_rival(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -2155,38 +1726,18 @@ API接口：POST /web/addRival
         await add_rival.send("请提供要添加的对手名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await add_rival.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/addRival', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await add_rival.send(f"已成功添加对手：{turbo_name}")
-            elif response.status_code == 400:
-                await add_rival.send("请求数据不合法，请检查输入的对手名称。")
-            elif response.status_code == 401:
-                await add_rival.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await add_rival.send("权限不足，无法添加对手。")
-            elif response.status_code == 410:
-                await add_rival.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await add_rival.send(f"{error_message}")
-            else:
-                await add_rival.send(f"添加对手失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await add_rival.send(f"添加对手过程中出现错误：{e}")
+    await _call_api(add_rival, "添加对手", turbo_api.add_rival(bot_key, turbo_name), "请求数据不合法，请检查输入的对手名称。")
+    await add_rival.send(f"已成功添加对手：{turbo_name}")
 
 
 @remove_rival.handle()
+@command_deadline()
+@_reply_errors(remove_rival, "删除对手")
 async def handle_remove_rival(event: MessageEvent, arg: Message = CommandArg()):
     """
     @Author: TurboServlet
@@ -2221,35 +1772,13 @@ API接口：POST /web/removeRival
         await remove_rival.send("请提供要删除的对手名称。")
         return
 
-    bot_key = get_bot_key(qqid)
+    bot_key = await get_bot_key(qqid)
     if not bot_key:
         await remove_rival.send("您尚未绑定，请先绑定。")
         return
 
-    headers = {"Authorization": f"BotKey {bot_key}"}
-    payload = {"turboName": turbo_name}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f'{Config.api_base_url}/web/removeRival', json=payload, headers=headers)
-
-            if response.status_code == 200:
-                await remove_rival.send(f"已成功删除对手：{turbo_name}")
-            elif response.status_code == 400:
-                await remove_rival.send("请求数据不合法，请检查输入的对手名称。")
-            elif response.status_code == 401:
-                await remove_rival.send("请求的Token缺失或不合法，请检查权限。")
-            elif response.status_code == 403:
-                await remove_rival.send("权限不足，无法删除对手。")
-            elif response.status_code == 410:
-                await remove_rival.send("该用户已被封禁，请联系管理员。")
-            elif response.status_code == 500:
-                error_message = response.json().get("message", "服务器内部错误")
-                await remove_rival.send(f"{error_message}")
-            else:
-                await remove_rival.send(f"删除对手失败，HTTP响应状态码为 {response.status_code}。")
-    except Exception as e:
-        await remove_rival.send(f"删除对手过程中出现错误：{e}")
+    await _call_api(remove_rival, "删除对手", turbo_api.remove_rival(bot_key, turbo_name), "请求数据不合法，请检查输入的对手名称。")
+    await remove_rival.send(f"已成功删除对手：{turbo_name}")
 
 
 def get_setting_name(key: str) -> str:
@@ -2269,3 +1798,42 @@ def get_setting_name(key: str) -> str:
         'showAchievement': '显示成就',
     }
     return setting_names.get(key, key)
+
+
+@show_stats.handle()
+async def handle_show_stats(event: MessageEvent):
+    """
+    @Func: handle_show_stats()
+    @Description: 输出 Turbo API 响应缓存的命中统计（仅超级用户）
+    @Param {MessageEvent} event: 消息事件
+    """
+    stats = turbo_api.cache.stats()
+    lines = [
+        f"响应缓存：{len(turbo_api.cache)} 条，条件请求校验值：{len(turbo_api.validators)} 条",
+        f"合并的并发请求：{turbo_api.flight.shared} 次",
+        f"限速排队：{turbo_api.limiter.queued} 次，限速拒绝：{turbo_api.limiter.rejected} 次",
+        f"重试：{turbo_api.retries} 次",
+        f"并发上限：{turbo_api.concurrency.limit:.1f}，"
+        f"进行中 {turbo_api.concurrency.in_flight}，排队超时 {turbo_api.concurrency.rejected} 次",
+        f"后台请求：进行中 {turbo_api.concurrency.running(Priority.BACKGROUND)}，"
+        f"排队 {turbo_api.concurrency.queued(Priority.BACKGROUND)}",
+        f"条件请求未修改（304）：{turbo_api.not_modified} 次",
+        f"对冲请求：{turbo_api.hedge_budget.hedged} 次",
+        f"机厅预取：{arcade_prefetch.prefetched} 次，失败 {arcade_prefetch.failed} 次，限速跳过 {arcade_prefetch.skipped} 次，当前热门："
+        + ("、".join(f"{name}（{score:.1f}）" for name, score in arcade_prefetch.hot()) or "无"),
+        f"HTTP/2：{'开启' if http2_enabled() else '关闭'}，"
+        + ("，".join(f"{version} {count} 次" for version, count in sorted(protocol_counts.items())) or "尚无请求"),
+    ]
+    for endpoint, breaker in sorted(turbo_api.breakers.items()):
+        if breaker.opened or breaker.state != "closed":
+            lines.append(f"{endpoint}：熔断 {breaker.opened} 次，当前状态 {breaker.state}")
+    for endpoint in Config.hedge_paths:
+        p95 = turbo_api.latency.percentile(endpoint, 0.95)
+        if p95 is not None:
+            lines.append(f"{endpoint}：近期 p95 耗时 {p95 * 1000:.0f} ms")
+    for endpoint, counts in sorted(stats.items()):
+        served = counts["hits"] + counts["stale"]
+        total = served + counts["misses"]
+        hit_rate = served / total if total else 0
+        lines.append(f"{endpoint}：命中 {counts['hits']} 次，过期命中 {counts['stale']} 次，未命中 {counts['misses']} 次，命中率 {hit_rate:.2%}")
+    await show_stats.send("\n".join(lines))
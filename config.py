@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 import os
 
 # 获取插件目录的绝对路径
@@ -8,7 +8,71 @@ _PLUGIN_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 
 class Config:
     data_file: str = str(_PLUGIN_DIR / "XM-Turbo.json")
+    sqlite_file: str = str(_PLUGIN_DIR / "database" / "botKey.db")
+    storage_backend: str = "json"  # 绑定数据存储后端：json / sqlite / journal
+    binding_snapshot_enabled: bool = False  # 多个 NoneBot 进程共享一份内存映射的只读绑定快照（配合 sqlite 后端）
+    binding_snapshot_file: str = str(_PLUGIN_DIR / "database" / "bindings.snap")
+    binding_snapshot_delay: float = 1.0  # 绑定/解绑后延迟重新生成快照的时间（秒）
     api_base_url: str = "https://api.sys-allnet.com"
     bot_name: str = "XMaoBot-Turbo"
     allowed_groups: List[int] = []  # 授权群组，空列表允许所有群
     session_expire_timeout: int = 60  # 会话超时时间（秒）
+    data_flush_delay: float = 1.0  # 绑定数据修改后延迟写盘的时间（秒），期间的多次修改合并为一次写入
+    data_file_watch: bool = True  # 监听 XM-Turbo.json 的外部修改并自动重新加载（json 后端）
+    data_file_poll_interval: float = 2.0  # 无法使用 inotify 时检查文件修改时间的间隔（秒）
+    journal_compact_interval: float = 300.0  # journal 后端把日志合并进快照的间隔（秒）
+    journal_compact_threshold: int = 1000  # journal 后端日志累积到该条数时立即合并
+    storage_io_workers: int = 2  # 绑定数据磁盘读写线程数
+    storage_io_queue_size: int = 64  # 同时排队的磁盘读写操作上限，超出后在事件循环中等待
+    bind_coalesce_window: float = 0.05  # 绑定/解绑合并写入的时间窗口（秒），窗口内的修改一次落盘（json 后端本身延迟写盘，不使用该窗口）
+    http_max_connections: int = 32  # 共享 HTTP 连接池的最大连接数
+    http_max_keepalive_connections: int = 16  # 连接池中保持空闲以便复用的连接数
+    http_keepalive_expiry: float = 60.0  # 空闲连接保持的时间（秒）
+    http2: bool = False  # 与 Turbo API 之间使用 HTTP/2 多路复用（需安装 httpx[http2]），服务端不支持时自动回退 HTTP/1.1
+    http2_max_concurrent_streams: int = 100  # HTTP/2 模式下同时进行的请求（流）数上限
+    response_cache_size: int = 512  # 响应缓存最多保存的条目数
+    # 只读接口的响应缓存策略：接口路径 -> (缓存秒数, 是否按 botKey 分别缓存)，未列出的接口不缓存
+    response_cache_policies: Dict[str, Tuple[float, bool]] = {
+        "/web/showServerRequests": (10.0, False),
+        "/web/arcadeInfoDetail": (15.0, False),
+        "/web/showNetworkStatus": (15.0, False),
+    }
+    # 过期后仍可立即返回旧数据（同时在后台刷新）的最长时间（秒）：接口路径 -> 秒数，需同时配置在 response_cache_policies 中
+    response_stale_policies: Dict[str, float] = {
+        "/web/showServerRequests": 300.0,
+        "/web/arcadeInfoDetail": 300.0,
+    }
+    adaptive_concurrency_initial: int = 16  # 发往 Turbo API 的初始并发上限，之后按上游状况自动调整
+    adaptive_concurrency_min: int = 2  # 并发上限的下限
+    adaptive_concurrency_max: int = 32  # 并发上限的上限
+    adaptive_slow_ratio: float = 3.0  # 请求耗时超过该接口近期中位数的这一倍数时视为上游拥塞
+    background_concurrency_share: float = 0.5  # 后台请求（预取、后台刷新）最多占用并发上限的比例，有用户指令排队时后台请求一律让行
+    adaptive_max_wait: float = 5.0  # 超出并发上限的请求最长排队时间（秒），超过则回复“服务繁忙”
+    # 开启请求对冲的接口（默认关闭），如 ["/web/arcadeInfoDetail", "/web/showServerRequests", "/web/showNetworkStatus"]
+    hedge_paths: List[str] = []
+    hedge_percentile: float = 0.95  # 请求耗时超过该接口近期耗时的这一分位数后发出对冲请求
+    hedge_max_ratio: float = 0.05  # 对冲请求最多占上述接口请求数的比例
+    conditional_requests: bool = True  # 保存上游返回的 ETag / Last-Modified，再次查询时发出条件请求，未修改（304）时沿用已保存的数据
+    conditional_cache_size: int = 256  # 未配置缓存策略的接口（历史记录、好友列表等）为条件请求最多保存的响应数，与响应缓存分开计数
+    prefetch_top_n: int = 5  # 后台定期预取查询最频繁的前 N 个机厅的信息，0 为关闭
+    prefetch_interval: float = 10.0  # 预取的间隔（秒），应小于 /web/arcadeInfoDetail 的缓存秒数
+    prefetch_budget: int = 5  # 每轮预取最多发出的请求数
+    prefetch_bot_key: str = ""  # 预取使用的 botKey（建议为机器人专用账号），留空时使用最近查询该机厅的用户的 botKey
+    rate_limit_mode: str = "queue"  # 超出限速时：queue = 排队等待（最多 rate_limit_max_wait 秒），reply = 回复“请求过于频繁”，shed = 不回复直接丢弃
+    rate_limit_user_rate: float = 1.0  # 每个 botKey 每秒可发出的请求数
+    rate_limit_user_burst: int = 5  # 每个 botKey 允许的突发请求数
+    rate_limit_global_rate: float = 20.0  # 发往 api_base_url 的总请求速率（每秒）
+    rate_limit_global_burst: int = 40  # 总请求允许的突发数
+    rate_limit_max_wait: float = 5.0  # queue 模式下最长排队时间（秒），超过则回复提示
+    retry_max_attempts: int = 3  # GET 请求遇到网络错误或 502/503/504 时的最多尝试次数
+    retry_base_delay: float = 0.2  # 重试的初始退避时间（秒），每次翻倍并随机抖动
+    retry_max_delay: float = 2.0  # 单次重试退避时间的上限（秒）
+    circuit_failure_threshold: int = 5  # 同一接口连续失败该次数后熔断
+    circuit_reset_timeout: float = 30.0  # 熔断持续时间（秒），之后放行一个探测请求
+    command_deadline: float = 15.0  # 单条指令等待 Turbo API 的总时长上限（秒），包括排队、重试和多个请求
+    # 各接口的 (连接, 读取, 总) 超时（秒），未列出的接口使用 "default"
+    api_timeouts: Dict[str, Tuple[float, float, float]] = {
+        "default": (3.0, 8.0, 10.0),
+        "/web/records": (3.0, 10.0, 12.0),
+        "/web/setAvatar": (5.0, 60.0, 60.0),
+    }
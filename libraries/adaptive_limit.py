@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .priority import Priority
+
+
+class Overloaded(Exception):
+    """等待并发配额超时"""
+
+    def __init__(self, waited: float):
+        super().__init__(f"concurrency limit reached, waited {waited:.1f}s")
+        self.waited = waited
+
+
+class AdaptiveLimiter:
+    """按 AIMD（加性增、乘性减）自动调整的并发上限
+
+    每个未拥塞的请求使上限增加 1/上限（即每轮满载约 +1），出现拥塞信号（5xx、超时、明显变慢）时上限乘以 backoff，
+    cooldown 秒内最多下调一次，避免同一批失败请求把上限压到最低。
+
+    超出上限的请求按优先级排队，同一优先级内按到达顺序：有配额空出时总是先放行 INTERACTIVE 请求；
+    BACKGROUND 请求只在没有前台请求排队时放行，且同时进行的数量不超过上限的 background_share。
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, background_share: float = 0.5,
+                 backoff: float = 0.75, cooldown: float = 1.0, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.background_share = background_share
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._waiters: Dict[Priority, deque] = {priority: deque() for priority in Priority}
+        self._running: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.in_flight = 0
+        self.rejected = 0  # 排队超时的请求数
+
+    def _has_room(self, priority: Priority) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        if priority is Priority.BACKGROUND:
+            return self._running[priority] < max(1, int(self.limit * self.background_share))
+        return True
+
+    def _take(self, priority: Priority):
+        self.in_flight += 1
+        self._running[priority] += 1
+
+    def _wake(self):
+        for priority in Priority:
+            waiters = self._waiters[priority]
+            while waiters and self._has_room(priority):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self._take(priority)
+                    waiter.set_result(None)
+            if waiters:
+                return  # 高优先级的请求仍在排队，不放行低优先级的请求
+
+    def _queued_ahead(self, priority: Priority) -> bool:
+        return any(self._waiters[p] for p in Priority if p <= priority)
+
+    def try_acquire(self, priority: Priority = Priority.INTERACTIVE) -> bool:
+        """不排队地取得一个并发配额，没有空闲配额时返回 False（不计入 rejected）；取得后同样要调用 release()"""
+        if self._has_room(priority) and not self._queued_ahead(priority):
+            self._take(priority)
+            return True
+        return False
+
+    async def acquire(self, max_wait: float, priority: Priority = Priority.INTERACTIVE):
+        """取得一个并发配额，最多等待 max_wait 秒，超时抛出 Overloaded；取得后必须以相同的 priority 调用 release()"""
+        if self.try_acquire(priority):
+            return
+        if max_wait <= 0:
+            self.rejected += 1
+            raise Overloaded(0.0)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # 超时的同时刚好分到配额
+            self.rejected += 1
+            raise Overloaded(max_wait)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(None, priority)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters[priority].remove(waiter)
+                except ValueError:
+                    pass
+                self._wake()  # 排在前面的请求离开后，后面低优先级的请求可能可以放行
+
+    def queued(self, priority: Priority) -> int:
+        return len(self._waiters[priority])
+
+    def running(self, priority: Priority) -> int:
+        return self._running[priority]
+
+    def release(self, congested: Optional[bool], priority: Priority = Priority.INTERACTIVE):
+        """归还配额；congested 为 None 表示请求未得出上游是否拥塞的结论（如被取消），不调整上限"""
+        self.in_flight -= 1
+        self._running[priority] -= 1
+        if congested:
+            now = self._clock()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif congested is False:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
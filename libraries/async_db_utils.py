@@ -0,0 +1,92 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from ..config import Config
+from . import db_utils
+from .binding_record import BindingRecord
+
+# 磁盘 I/O 专用线程池，避免阻塞事件循环
+_executor = ThreadPoolExecutor(max_workers=Config.storage_io_workers, thread_name_prefix="turbobot-io")
+_slots: Optional[asyncio.Semaphore] = None
+# 写入合并：同一时间窗口内的绑定/解绑在一次落盘中完成，_write_lock 保证落盘串行
+_write_lock: Optional[asyncio.Lock] = None
+_pending_ops: List[Tuple[str, Optional[BindingRecord], asyncio.Future]] = []
+_flush_tasks: Set[asyncio.Task] = set()
+
+
+def _get_slots() -> asyncio.Semaphore:
+    """排队上限：超过 Config.storage_io_queue_size 的请求在事件循环中等待，而不是堆积在线程池队列里"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(Config.storage_io_queue_size)
+    return _slots
+
+
+async def _run(func, *args):
+    """在存储线程池中执行同步存储操作"""
+    async with _get_slots():
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def _flush_pending():
+    """等待合并窗口结束，然后把窗口内的所有修改一次性提交给存储
+
+    json 等本身延迟写盘的存储已经会合并写入，不再额外等待窗口，只合并同一轮事件循环中提交的修改。
+    """
+    global _write_lock
+    await asyncio.sleep(0 if db_utils.is_write_behind() else Config.bind_coalesce_window)
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    async with _write_lock:
+        batch = _pending_ops[:]
+        _pending_ops.clear()
+        try:
+            await _run(db_utils.apply_mutations, [(qqid, record) for qqid, record, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+async def _mutate(qqid: str, record: Optional[BindingRecord]):
+    """提交一次修改并等待存储接受（record 为 None 表示解绑）
+
+    sqlite、journal 后端返回时修改已写入磁盘；json 后端返回时修改已在内存中生效，由存储在 data_flush_delay 秒后写盘。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _pending_ops.append((qqid, record, future))
+    if len(_pending_ops) == 1:
+        task = loop.create_task(_flush_pending())
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+    await future
+
+
+async def is_already_bound(qqid: str) -> bool:
+    """检查用户是否已经绑定"""
+    if db_utils.is_memory_backed():
+        return db_utils.is_already_bound(qqid)
+    return await _run(db_utils.is_already_bound, qqid)
+
+
+async def get_bot_key(qqid: str) -> Optional[str]:
+    """获取用户的bot_key"""
+    if db_utils.is_memory_backed():
+        return db_utils.get_bot_key(qqid)
+    return await _run(db_utils.get_bot_key, qqid)
+
+
+async def bind_user(qqid: str, bot_token: str, bot_key: str):
+    """绑定用户信息"""
+    await _mutate(qqid, db_utils.make_record(bot_token, bot_key))
+
+
+async def unbind_user(qqid: str):
+    """解除用户绑定"""
+    await _mutate(qqid, None)
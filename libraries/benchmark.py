@@ -0,0 +1,238 @@
+"""绑定存储基准测试
+
+在插件目录下执行（无需网络）：
+    python -m libraries.benchmark storage [--sizes 1000,10000,100000] [--backends json,sqlite,journal,snapshot]
+    python -m libraries.benchmark memory [--users 100000]
+
+storage 为每个 (后端, 用户数) 组合启动独立子进程，测量冷启动加载时间、查询延迟、
+绑定/解绑吞吐量以及加载后常驻内存（RSS）的增量。
+"""
+import argparse
+import gc
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .binding_record import BindingRecord, encode_users
+
+BACKENDS = ["json", "sqlite", "journal", "snapshot"]
+
+
+def synthetic_users(count: int) -> List[Tuple[str, str, str]]:
+    """生成 count 个 (qqid, bot_token, bot_key)，长度与真实数据接近"""
+    return [(str(100000000 + i), uuid.uuid4().hex, str(uuid.uuid4())) for i in range(count)]
+
+
+def _measure(build: Callable[[], object]) -> int:
+    """返回 build() 产生并保持存活的对象占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def bench_memory(count: int) -> Dict[str, float]:
+    """对比旧版 dict + strftime 字符串与 BindingRecord 的每用户内存占用"""
+    users = synthetic_users(count)
+    now = int(time.time())
+
+    def build_dicts():
+        return {
+            qqid: {
+                "bot_token": token,
+                "bot_key": key,
+                "bind_time": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for qqid, token, key in users
+        }
+
+    def build_records():
+        return {qqid: BindingRecord(token, key, now + 1000000) for qqid, token, key in users}
+
+    # qqid/token/key 字符串在两种表示中共享，这里只统计每条记录自身的开销
+    return {
+        "dict": _measure(build_dicts) / count,
+        "record": _measure(build_records) / count,
+    }
+
+
+def _rss_bytes() -> int:
+    """当前进程的常驻内存；非 Linux 平台退化为峰值 RSS"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _prepare_dataset(directory: Path, count: int):
+    """生成 XM-Turbo.json、SQLite 数据库和快照三种格式的同一份数据"""
+    from .snapshot_store import write_snapshot
+    from .sqlite_store import SqliteBindingStore
+
+    users = {qqid: BindingRecord(token, key, 1700000000 + i)
+             for i, (qqid, token, key) in enumerate(synthetic_users(count))}
+    with open(directory / "XM-Turbo.json", "w", encoding="utf-8") as f:
+        json.dump(encode_users(users), f, ensure_ascii=False, indent=2)
+    store = SqliteBindingStore(directory / "botKey.db")
+    store.apply_batch(list(users.items()))
+    store.flush()
+    store.close()
+    write_snapshot(directory / "bindings.snap", users.items())
+
+
+def _open_store(backend: str, directory: Path):
+    from .journal_store import JournalBindingStore
+    from .json_store import JsonBindingStore
+    from .snapshot_store import SnapshotBindingStore
+    from .sqlite_store import SqliteBindingStore
+
+    if backend == "json":
+        return JsonBindingStore(directory / "XM-Turbo.json", flush_delay=3600.0)
+    if backend == "journal":
+        return JournalBindingStore(directory / "XM-Turbo.json", compact_interval=3600.0, compact_threshold=1 << 30)
+    if backend == "sqlite":
+        return SqliteBindingStore(directory / "botKey.db")
+    if backend == "snapshot":
+        return SnapshotBindingStore(SqliteBindingStore(directory / "botKey.db"), directory / "bindings.snap",
+                                    regenerate_delay=3600.0)
+    raise ValueError(f"未知的存储后端：{backend}")
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_case(backend: str, directory: Path, lookups: int, writes: int) -> Dict[str, float]:
+    """在当前进程中测量单个后端（由 storage 子命令在独立子进程中调用）"""
+    gc.collect()
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    store = _open_store(backend, directory)
+    load_time = time.perf_counter() - started
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    rng = random.Random(0)
+    keys = [qqid for qqid, _ in store.iter_items()]
+    probes = [rng.choice(keys) if rng.random() < 0.9 else str(rng.randint(1, 99999999)) for _ in range(lookups)]
+    samples = []
+    for qqid in probes:
+        t = time.perf_counter()
+        store.get(qqid)
+        samples.append(time.perf_counter() - t)
+
+    new_users = synthetic_users(writes)
+    started = time.perf_counter()
+    for qqid, token, key in new_users:
+        store.put("b" + qqid, BindingRecord(token, key, int(time.time())))
+    for qqid, _, _ in new_users:
+        store.delete("b" + qqid)
+    store.flush()
+    write_time = time.perf_counter() - started
+    store.close()
+
+    return {
+        "load_ms": load_time * 1000,
+        "lookup_p50_us": _percentile(samples, 0.5) * 1e6,
+        "lookup_p99_us": _percentile(samples, 0.99) * 1e6,
+        "write_ops": 2 * writes / write_time,
+        "rss_mb": (rss_after - rss_before) / (1 << 20),
+    }
+
+
+def bench_storage(sizes: List[int], backends: List[str], lookups: int, writes: int) -> List[Dict]:
+    """对每个 (用户数, 后端) 组合在独立子进程中运行 run_case"""
+    results = []
+    package_root = Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory(prefix="turbobot-bench-") as tmp:
+        for size in sizes:
+            dataset = Path(tmp) / f"dataset-{size}"
+            dataset.mkdir()
+            print(f"生成 {size} 个用户的数据集……", file=sys.stderr)
+            _prepare_dataset(dataset, size)
+            for backend in backends:
+                case_dir = Path(tmp) / f"{backend}-{size}"
+                shutil.copytree(dataset, case_dir)
+                output = subprocess.run(
+                    [sys.executable, "-m", "libraries.benchmark", "_case", backend, str(case_dir),
+                     "--lookups", str(lookups), "--writes", str(writes)],
+                    cwd=package_root, check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output)
+                result.update(backend=backend, users=size)
+                results.append(result)
+                print(f"  {backend:<8} 完成", file=sys.stderr)
+                shutil.rmtree(case_dir)
+    return results
+
+
+def _print_storage_results(results: List[Dict]):
+    header = f"{'后端':<10}{'用户数':>9}{'冷启动ms':>11}{'查询p50µs':>12}{'查询p99µs':>12}{'写入ops/s':>12}{'RSS增量MB':>12}"
+    print(header)
+    for r in results:
+        print(f"{r['backend']:<10}{r['users']:>9}{r['load_ms']:>11.1f}{r['lookup_p50_us']:>12.2f}"
+              f"{r['lookup_p99_us']:>12.2f}{r['write_ops']:>12.0f}{r['rss_mb']:>12.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m libraries.benchmark", description="Turbobot 绑定存储基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_storage = sub.add_parser("storage", help="各存储后端在不同规模下的性能")
+    p_storage.add_argument("--sizes", default="1000,10000,100000", help="逗号分隔的用户数")
+    p_storage.add_argument("--backends", default=",".join(BACKENDS), help="逗号分隔的后端")
+    p_storage.add_argument("--lookups", type=int, default=20000, help="每个组合的查询次数")
+    p_storage.add_argument("--writes", type=int, default=500, help="每个组合绑定再解绑的用户数")
+    p_storage.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    p_case = sub.add_parser("_case")
+    p_case.add_argument("backend", choices=BACKENDS)
+    p_case.add_argument("directory")
+    p_case.add_argument("--lookups", type=int, default=20000)
+    p_case.add_argument("--writes", type=int, default=500)
+    p_memory = sub.add_parser("memory", help="每个绑定用户的内存占用")
+    p_memory.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    if args.command == "storage":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        backends = args.backends.split(",")
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            parser.error(f"未知的存储后端：{', '.join(sorted(unknown))}")
+        results = bench_storage(sizes, backends, args.lookups, args.writes)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            _print_storage_results(results)
+    elif args.command == "_case":
+        print(json.dumps(run_case(args.backend, Path(args.directory), args.lookups, args.writes)))
+    elif args.command == "memory":
+        result = bench_memory(args.users)
+        print(f"{args.users} 个用户的每用户内存占用（不含 qqid/token/key 字符串本身）：")
+        print(f"  dict + 字符串时间  {result['dict']:8.1f} 字节")
+        print(f"  BindingRecord      {result['record']:8.1f} 字节")
+        print(f"  节省               {1 - result['record'] / result['dict']:8.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict
+
+
+def parse_bind_time(value) -> int:
+    """把绑定时间转为 Unix 时间戳，兼容旧版 "%Y-%m-%d %H:%M:%S" 格式的字符串"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        if value.isdigit():
+            return int(value)
+        try:
+            return int(datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp())
+        except ValueError:
+            return 0
+    return 0
+
+
+class BindingRecord:
+    """一条绑定记录；使用 __slots__ 并以整数时间戳保存绑定时间，降低大量用户常驻内存时的开销"""
+
+    __slots__ = ("bot_token", "bot_key", "bind_time")
+
+    def __init__(self, bot_token: str, bot_key: str, bind_time: int):
+        self.bot_token = bot_token
+        self.bot_key = bot_key
+        self.bind_time = bind_time
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BindingRecord":
+        """从 JSON 对象构造（缺少 bot_token/bot_key 时抛出 KeyError）"""
+        return cls(data["bot_token"], data["bot_key"], parse_bind_time(data.get("bind_time")))
+
+    def to_dict(self) -> dict:
+        """转为 JSON 对象"""
+        return {"bot_token": self.bot_token, "bot_key": self.bot_key, "bind_time": self.bind_time}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BindingRecord):
+            return NotImplemented
+        return (self.bot_token, self.bot_key, self.bind_time) == (other.bot_token, other.bot_key, other.bind_time)
+
+    def __repr__(self) -> str:
+        return f"BindingRecord(bot_token={self.bot_token!r}, bot_key={self.bot_key!r}, bind_time={self.bind_time})"
+
+
+def decode_users(data: dict) -> Dict[str, BindingRecord]:
+    """解析 XM-Turbo.json 格式中的 users，跳过缺少字段的记录"""
+    users = {}
+    for qqid, value in data.get("users", {}).items():
+        try:
+            users[qqid] = BindingRecord.from_dict(value)
+        except (KeyError, TypeError):
+            continue
+    return users
+
+
+def encode_users(users: Dict[str, BindingRecord]) -> dict:
+    """生成 XM-Turbo.json 格式的数据"""
+    return {"users": {qqid: record.to_dict() for qqid, record in users.items()}}
@@ -0,0 +1,66 @@
+import random
+import time
+from typing import Optional
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """第 attempt 次重试前的等待时间：指数退避并加入完全随机抖动，避免大量请求同时重试"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitOpen(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"circuit open, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """单个接口的熔断器
+
+    连续失败 failure_threshold 次后打开，reset_timeout 秒内的请求直接失败；
+    之后进入半开状态，只放行一个探测请求：成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.opened = 0  # 打开的次数
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def acquire(self) -> bool:
+        """请求前调用；熔断时抛出 CircuitOpen，返回本次请求是否为半开状态的探测请求"""
+        if self._opened_at is None:
+            return False
+        remaining = self._opened_at + self.reset_timeout - self._clock()
+        if remaining > 0:
+            raise CircuitOpen(remaining)
+        if self._probing:
+            raise CircuitOpen(1.0)
+        self._probing = True
+        return True
+
+    def release(self, probe: bool, ok: Optional[bool]):
+        """请求结束后调用；ok 为 None 表示请求未得出上游是否健康的结论（如被取消）"""
+        if probe:
+            self._probing = False
+        if ok:
+            self._failures = 0
+            self._opened_at = None
+        elif ok is False:
+            self._failures += 1
+            if probe or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self.opened += 1
@@ -1,62 +1,106 @@
-import json
-from datetime import datetime
-from pathlib import Path
-from typing import Optional
+import atexit
+import time
+from typing import List, Optional, Tuple
 
 from nonebot import logger
 
 from ..config import Config
+from .binding_record import BindingRecord
+from .json_store import JsonBindingStore
 
-_data_file = Path(Config.data_file)
-logger.info(f"Turbobot 数据文件路径: {_data_file}")
 
+def _create_store():
+    """根据 Config.storage_backend 创建绑定存储，开启 binding_snapshot_enabled 时在外面包一层共享快照"""
+    store = _create_primary_store()
+    if not Config.binding_snapshot_enabled:
+        return store
+    from .snapshot_store import SnapshotBindingStore
+    if Config.storage_backend != "sqlite":
+        logger.warning("Turbobot 共享绑定快照需要多进程共用同一份主存储，建议使用 sqlite 后端")
+    logger.info(f"Turbobot 共享绑定快照路径: {Config.binding_snapshot_file}")
+    return SnapshotBindingStore(
+        store,
+        Config.binding_snapshot_file,
+        regenerate_delay=Config.binding_snapshot_delay,
+        logger=logger,
+        poll_interval=Config.data_file_poll_interval,
+    )
 
-def _load_data() -> dict:
-    """加载JSON数据"""
-    if _data_file.exists():
-        try:
-            with open(_data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"users": {}}
-    return {"users": {}}
 
+def _create_primary_store():
+    """根据 Config.storage_backend 创建主存储"""
+    backend = Config.storage_backend
+    if backend == "sqlite":
+        from .sqlite_store import SqliteBindingStore
+        logger.info(f"Turbobot 数据库路径: {Config.sqlite_file}")
+        return SqliteBindingStore(Config.sqlite_file, logger=logger)
+    if backend == "journal":
+        from .journal_store import JournalBindingStore
+        logger.info(f"Turbobot 数据文件路径: {Config.data_file}（日志模式）")
+        return JournalBindingStore(
+            Config.data_file,
+            compact_interval=Config.journal_compact_interval,
+            compact_threshold=Config.journal_compact_threshold,
+            logger=logger,
+        )
+    if backend != "json":
+        logger.warning(f"Turbobot 未知的存储后端 {backend!r}，已使用 json")
+    logger.info(f"Turbobot 数据文件路径: {Config.data_file}")
+    return JsonBindingStore(
+        Config.data_file,
+        flush_delay=Config.data_flush_delay,
+        logger=logger,
+        watch=Config.data_file_watch,
+        poll_interval=Config.data_file_poll_interval,
+    )
 
-def _save_data(data: dict):
-    """保存JSON数据"""
-    with open(_data_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+
+_store = _create_store()
+atexit.register(_store.close)
+
+
+def flush():
+    """立即将未落盘的绑定数据写回磁盘"""
+    _store.flush()
+
+
+def is_memory_backed() -> bool:
+    """当前存储的查询是否只访问内存（无需放到线程池执行）"""
+    return _store.in_memory
+
+
+def is_write_behind() -> bool:
+    """当前存储是否本身就延迟合并写盘（修改先进入内存，稍后统一写入）"""
+    return _store.write_behind
 
 
 def is_already_bound(qqid: str) -> bool:
     """检查用户是否已经绑定"""
-    data = _load_data()
-    return qqid in data.get("users", {})
+    return _store.contains(qqid)
 
 
 def get_bot_key(qqid: str) -> Optional[str]:
     """获取用户的bot_key"""
-    data = _load_data()
-    user = data.get("users", {}).get(qqid)
-    return user.get("bot_key") if user else None
+    user = _store.get(qqid)
+    return user.bot_key if user else None
+
+
+def make_record(bot_token: str, bot_key: str) -> BindingRecord:
+    """生成一条新的绑定记录"""
+    return BindingRecord(bot_token, bot_key, int(time.time()))
 
 
 def bind_user(qqid: str, bot_token: str, bot_key: str):
     """绑定用户信息"""
-    data = _load_data()
-    if "users" not in data:
-        data["users"] = {}
-    data["users"][qqid] = {
-        "bot_token": bot_token,
-        "bot_key": bot_key,
-        "bind_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    _save_data(data)
+    _store.put(qqid, make_record(bot_token, bot_key))
 
 
 def unbind_user(qqid: str):
     """解除用户绑定"""
-    data = _load_data()
-    if qqid in data.get("users", {}):
-        del data["users"][qqid]
-        _save_data(data)
+    _store.delete(qqid)
+
+
+def apply_mutations(ops: List[Tuple[str, Optional[BindingRecord]]]):
+    """批量应用绑定/解绑（record 为 None 表示解绑），整批只落盘一次"""
+    if ops:
+        _store.apply_batch(ops)
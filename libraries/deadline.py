@@ -0,0 +1,40 @@
+import asyncio
+import functools
+from contextvars import ContextVar
+from typing import Optional
+
+from ..config import Config
+
+# 当前指令的截止时间（事件循环时钟），由 command_deadline 设置，同一指令内的所有请求共享
+_deadline: ContextVar[Optional[float]] = ContextVar("turbobot_deadline", default=None)
+
+
+def command_deadline(seconds: Optional[float] = None):
+    """为事件处理函数设置总时长上限（默认 Config.command_deadline 秒），期间发出的所有 Turbo API 请求都受其约束
+
+    需放在 @matcher.handle() 之下；functools.wraps 保留原函数签名，不影响 NoneBot 的依赖注入。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            budget = seconds if seconds is not None else Config.command_deadline
+            token = _deadline.set(asyncio.get_running_loop().time() + budget)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _deadline.reset(token)
+        return wrapper
+    return decorator
+
+
+def remaining() -> Optional[float]:
+    """距当前指令截止还剩的秒数，没有截止时间时返回 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+def clear_deadline():
+    """在后台任务或多条指令共享的任务中调用，使其不再受触发它的指令的截止时间约束；等待它的指令各自限制等待时间"""
+    _deadline.set(None)
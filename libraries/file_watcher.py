@@ -0,0 +1,105 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path) -> Optional[Tuple[int, int, int]]:
+    """文件的 (inode, 大小, 修改时间) 签名，文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _init_inotify(directory: Path) -> Optional[int]:
+    """在 Linux 上为目录创建 inotify 监听，失败时返回 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        # 监听整个目录，才能捕获“写临时文件再重命名”式的原子替换
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """监听单个文件的变化：Linux 上使用 inotify，其他平台或 inotify 不可用时退化为定时比较文件签名
+
+    回调在后台线程中执行，查询路径上不会产生任何 stat 调用。
+    """
+
+    def __init__(self, path, on_change: Callable[[], None], poll_interval: float = 2.0, logger=None):
+        self.path = Path(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._logger = logger
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台监听线程"""
+        fd = _init_inotify(self.path.parent)
+        target = self._inotify_loop if fd is not None else self._poll_loop
+        self._thread = threading.Thread(target=target, args=(fd,), name="turbobot-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监听"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            if self._logger is not None:
+                self._logger.error(f"Turbobot 处理文件 {self.path.name} 变化失败: {e}")
+
+    def _inotify_loop(self, fd: int):
+        name = os.fsencode(self.path.name)
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                buf = os.read(fd, 64 * 1024)
+                changed = False
+                offset = 0
+                while offset + _IN_EVENT_HEADER.size <= len(buf):
+                    _, _, _, length = _IN_EVENT_HEADER.unpack_from(buf, offset)
+                    start = offset + _IN_EVENT_HEADER.size
+                    if buf[start:start + length].rstrip(b"\0") == name:
+                        changed = True
+                    offset = start + length
+                if changed:
+                    self._notify()
+        finally:
+            os.close(fd)
+
+    def _poll_loop(self, _fd=None):
+        last = file_signature(self.path)
+        while not self._stop.wait(self.poll_interval):
+            current = file_signature(self.path)
+            if current != last:
+                last = current
+                self._notify()
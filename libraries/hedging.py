@@ -0,0 +1,88 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """记录各接口最近 window 次请求的耗时，用于估计分位数"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, seconds: float):
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, endpoint: str, q: float) -> Optional[float]:
+        """最近耗时的 q 分位数（0~1）；样本不足 min_samples 个时返回 None"""
+        samples = self._samples.get(endpoint)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """限制对冲请求的比例：每个请求积累 ratio 个额度（最多 burst 个），每次对冲消耗 1 个"""
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._credit = 0.0
+        self.hedged = 0  # 实际发出的对冲请求数
+
+    def on_request(self):
+        self._credit = min(self.burst, self._credit + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._credit < 1:
+            return False
+        self._credit -= 1
+        self.hedged += 1
+        return True
+
+    def refund(self):
+        """撤销一次 try_spend()（对冲请求最终没有发出）"""
+        self._credit += 1
+        self.hedged -= 1
+
+
+async def hedged(factory: Callable[[], Awaitable[T]], delay: float, budget: HedgeBudget,
+                 admit: Optional[Callable[[], bool]] = None, release: Optional[Callable[[], None]] = None) -> T:
+    """执行 factory()，超过 delay 秒仍未完成且预算允许时再发出一个相同的请求，返回先成功的结果
+
+    admit 用于为对冲请求取得限速令牌、并发配额等资源（不等待），返回 False 时不对冲；
+    取得的资源在对冲请求结束（包括被取消）时通过 release 归还。
+    两个请求都失败时抛出先失败的那个异常；返回或被取消时未完成的请求会被取消。
+    """
+    first = asyncio.ensure_future(factory())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not budget.try_spend():
+            return await first
+        if admit is not None and not admit():
+            budget.refund()
+            return await first
+        second = asyncio.ensure_future(factory())
+        if release is not None:
+            second.add_done_callback(lambda _: release())
+        tasks.add(second)
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                if error is None:
+                    error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,78 @@
+import asyncio
+from collections import Counter
+from typing import Optional
+
+import httpx
+
+from ..config import Config
+
+# 插件共用的 HTTP 客户端：所有指令复用同一个连接池，避免每条指令重新建立 TCP/TLS 连接
+_client: Optional[httpx.AsyncClient] = None
+# HTTP/2 模式下限制同时进行的请求（流）数；HTTP/1.1 模式下为 None，并发由连接池大小限制
+_streams: Optional[asyncio.Semaphore] = None
+# 实际协商出的协议版本 -> 响应数，服务端不支持 HTTP/2 时会看到 HTTP/1.1
+protocol_counts: Counter = Counter()
+
+
+def _http2_available() -> bool:
+    """是否安装了 HTTP/2 所需的 h2 包（pip install httpx[http2]）"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_client() -> httpx.AsyncClient:
+    global _streams
+    limits = httpx.Limits(
+        max_connections=Config.http_max_connections,
+        max_keepalive_connections=Config.http_max_keepalive_connections,
+        keepalive_expiry=Config.http_keepalive_expiry,
+    )
+    # 开启 HTTP/2 后由 TLS ALPN 协商协议，服务端不支持时 httpx 自动使用 HTTP/1.1
+    http2 = Config.http2 and _http2_available()
+    _streams = asyncio.Semaphore(Config.http2_max_concurrent_streams) if http2 else None
+    return httpx.AsyncClient(limits=limits, http2=http2)
+
+
+async def open_http_client():
+    """创建共享客户端（在 NoneBot 启动时调用）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+
+
+async def close_http_client():
+    """关闭共享客户端并释放连接池（在 NoneBot 关闭时调用）"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享客户端；启动钩子尚未执行时按需创建"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+def http2_enabled() -> bool:
+    """共享客户端是否以 HTTP/2 模式创建（Config.http2 开启且已安装 h2）"""
+    get_http_client()
+    return _streams is not None
+
+
+async def send_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """通过共享客户端发出请求；HTTP/2 模式下先取得一个流配额，避免单个连接上的并发流过多"""
+    client = get_http_client()
+    streams = _streams
+    if streams is None:
+        response = await client.request(method, url, **kwargs)
+    else:
+        async with streams:
+            response = await client.request(method, url, **kwargs)
+    protocol_counts[response.http_version] += 1
+    return response
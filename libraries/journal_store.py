@@ -0,0 +1,259 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .binding_record import BindingRecord, decode_users, encode_users
+from .file_watcher import file_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，无法检测其他进程是否正在写入日志
+    fcntl = None
+
+
+class JournalBindingStore:
+    """日志结构的绑定存储：每次修改只追加一行日志，后台线程定期把日志合并进快照
+
+    快照与 XM-Turbo.json 格式相同，日志为同目录下的 <快照名>.journal（JSON Lines）。
+    合并时先把日志轮转为 .journal.1 再写快照，启动时依次重放 .journal.1 与 .journal，
+    重放是幂等的，所以任意时刻崩溃都不会丢失已追加的修改。
+
+    可写打开时持有 <日志名>.lock 文件锁，同一份数据只能有一个写入进程；
+    read_only=True 时只读取快照与日志，不修改任何文件，可用于导出运行中的机器人的数据。
+    """
+
+    in_memory = True  # 查询是否只访问内存
+    write_behind = False  # 修改立即追加到日志
+
+    def __init__(self, snapshot_path, compact_interval: float = 300.0,
+                 compact_threshold: int = 1000, logger=None, read_only: bool = False):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_name(self.snapshot_path.name + ".journal")
+        self._rotated_path = self.journal_path.with_name(self.journal_path.name + ".1")
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self.read_only = read_only
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._closed = read_only
+        if read_only:
+            self._pending = self._load_consistent()
+            return
+        self._writer_lock = self._lock_writer(self.journal_path)
+        self._pending = self._load()
+        self._ensure_newline(self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._wakeup = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, name="turbobot-compactor", daemon=True)
+        self._compactor.start()
+
+    @staticmethod
+    def _lock_writer(journal_path: Path):
+        """取得日志的写入锁，已被其他进程持有时抛出 RuntimeError"""
+        lock = open(journal_path.with_name(journal_path.name + ".lock"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                raise RuntimeError(f"{journal_path.name} 正被另一个进程（运行中的 Turbobot？）写入")
+        return lock
+
+    @classmethod
+    def in_use(cls, snapshot_path) -> bool:
+        """是否有其他进程正以可写方式打开这份数据（无法检测时返回 False）"""
+        snapshot_path = Path(snapshot_path)
+        journal_path = snapshot_path.with_name(snapshot_path.name + ".journal")
+        if not journal_path.with_name(journal_path.name + ".lock").exists():
+            return False
+        try:
+            lock = cls._lock_writer(journal_path)
+        except RuntimeError:
+            return True
+        lock.close()
+        return False
+
+    def _load(self) -> int:
+        """加载快照并依次重放 .journal.1 与 .journal，返回重放的记录数"""
+        self._users: Dict[str, BindingRecord] = self._load_snapshot()
+        return self._replay(self._rotated_path) + self._replay(self.journal_path)
+
+    def _generation(self):
+        """快照与当前日志文件的标识；合并会替换这两个文件，追加日志不会改变它们"""
+        journal = file_signature(self.journal_path)
+        return file_signature(self.snapshot_path), journal[0] if journal is not None else None
+
+    def _load_consistent(self, attempts: int = 5) -> int:
+        """只读加载；读取期间写入进程恰好在合并时重新读取，避免漏掉刚被轮转的日志"""
+        for _ in range(attempts):
+            before = self._generation()
+            pending = self._load()
+            if self._generation() == before:
+                return pending
+        raise RuntimeError(f"读取 {self.snapshot_path.name} 期间日志一直在合并，请稍后重试")
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("只读打开的绑定日志不能修改")
+
+    def _load_snapshot(self) -> Dict[str, BindingRecord]:
+        """加载快照"""
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    return decode_users(json.load(f))
+            except Exception:
+                return {}
+        return {}
+
+    def _replay(self, path: Path) -> int:
+        """重放日志文件，返回重放的记录数（忽略崩溃时写了一半的末尾行）"""
+        if not path.exists():
+            return 0
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                count += 1
+        return count
+
+    @staticmethod
+    def _ensure_newline(path: Path):
+        """确保日志以换行结尾，避免新记录接在崩溃留下的半行后面"""
+        if not path.exists() or path.stat().st_size == 0:
+            return
+        with open(path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _apply(self, entry: dict):
+        """把一条日志记录应用到内存索引"""
+        if entry.get("op") == "put":
+            self._users[entry["qqid"]] = BindingRecord.from_dict(entry["record"])
+        elif entry.get("op") == "del":
+            self._users.pop(entry["qqid"], None)
+
+    def _append(self, *entries: dict):
+        """追加日志记录，多条记录合并为一次写入（需持有 _lock）"""
+        self._journal.write("".join(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n" for entry in entries
+        ))
+        self._journal.flush()
+        self._pending += len(entries)
+        if self._pending >= self.compact_threshold:
+            self._wakeup.set()
+
+    def get(self, qqid: str) -> Optional[BindingRecord]:
+        """获取用户的绑定记录"""
+        return self._users.get(qqid)
+
+    def contains(self, qqid: str) -> bool:
+        """检查用户是否已经绑定"""
+        return qqid in self._users
+
+    def count(self) -> int:
+        """绑定记录总数"""
+        return len(self._users)
+
+    def iter_items(self) -> Iterator[Tuple[str, BindingRecord]]:
+        """遍历所有绑定记录（遍历的是调用时的快照）"""
+        return iter(list(self._users.items()))
+
+    def put(self, qqid: str, record: BindingRecord):
+        """写入用户的绑定记录"""
+        self._check_writable()
+        with self._lock:
+            self._append({"op": "put", "qqid": qqid, "record": record.to_dict()})
+            self._users[qqid] = record
+
+    def delete(self, qqid: str) -> bool:
+        """删除用户的绑定记录，返回记录是否存在"""
+        self._check_writable()
+        with self._lock:
+            if qqid not in self._users:
+                return False
+            self._append({"op": "del", "qqid": qqid})
+            del self._users[qqid]
+            return True
+
+    def apply_batch(self, ops: List[Tuple[str, Optional[BindingRecord]]]):
+        """批量写入/删除（record 为 None 表示删除），整批只追加一次日志"""
+        self._check_writable()
+        with self._lock:
+            entries = []
+            for qqid, record in ops:
+                if record is None:
+                    if self._users.pop(qqid, None) is not None:
+                        entries.append({"op": "del", "qqid": qqid})
+                else:
+                    self._users[qqid] = record
+                    entries.append({"op": "put", "qqid": qqid, "record": record.to_dict()})
+            if entries:
+                self._append(*entries)
+
+    def compact(self):
+        """把日志合并进快照（只读打开时什么也不做）"""
+        if self.read_only:
+            return
+        with self._compact_lock:
+            with self._lock:
+                if self._pending == 0 and not self._rotated_path.exists():
+                    return
+                snapshot = dict(self._users)
+                self._journal.close()
+                if self._rotated_path.exists():
+                    # 上一次合并未完成，把当前日志接在旧日志后面，保持重放顺序
+                    self._ensure_newline(self._rotated_path)
+                    with open(self.journal_path, "rb") as src, open(self._rotated_path, "ab") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self._rotated_path)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._pending = 0
+            tmp_file = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(encode_users(snapshot), f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_path)
+            os.remove(self._rotated_path)
+
+    def _compact_loop(self):
+        """后台合并线程：每 compact_interval 秒或日志超过 compact_threshold 条时合并一次"""
+        while not self._closed:
+            self._wakeup.wait(self.compact_interval)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.error(f"Turbobot 绑定日志合并失败: {e}")
+
+    def flush(self):
+        """立即合并日志"""
+        self.compact()
+
+    def close(self):
+        """停止合并线程并做最后一次合并（只读打开时什么也不做）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._compactor.join()
+        try:
+            self.compact()
+        finally:
+            with self._lock:
+                self._journal.close()
+            self._writer_lock.close()
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .binding_record import BindingRecord, decode_users, encode_users
+from .file_watcher import FileWatcher, file_signature
+
+
+class JsonBindingStore:
+    """基于 XM-Turbo.json 的绑定存储：数据常驻内存，修改后延迟合并写盘"""
+
+    in_memory = True  # 查询是否只访问内存
+    write_behind = True  # 修改先写入内存，flush_delay 秒后合并写盘
+
+    def __init__(self, path, flush_delay: float = 1.0, logger=None,
+                 watch: bool = False, poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.flush_delay = flush_delay
+        self._logger = logger
+        self._lock = threading.Lock()
+        # 从取快照到替换文件全程持有，写盘串行进行：两次写盘不会交错写同一个临时文件，旧快照也不会覆盖新快照
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        # 尚未写回磁盘的修改（None 表示删除），外部修改文件后重新加载时需要保留
+        self._unflushed: Dict[str, Optional[BindingRecord]] = {}
+        self._written_signature = file_signature(self.path)
+        self._users: Dict[str, BindingRecord] = decode_users(self._load_data())
+        self._watcher: Optional[FileWatcher] = None
+        if watch:
+            self._watcher = FileWatcher(self.path, self._on_change, poll_interval=poll_interval, logger=logger)
+            self._watcher.start()
+
+    def _load_data(self) -> dict:
+        """加载JSON数据"""
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                return {"users": {}}
+        return {"users": {}}
+
+    def _save_data(self, users: Dict[str, BindingRecord]):
+        """保存JSON数据（先写临时文件再替换，避免写到一半时文件损坏）"""
+        tmp_file = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(encode_users(users), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.path)
+        self._written_signature = file_signature(self.path)
+
+    def _reload(self):
+        """数据文件被外部修改（手动编辑、从备份恢复）时，重新解析并整体替换内存索引"""
+        signature = file_signature(self.path)
+        if signature is None or signature == self._written_signature:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            users = decode_users(json.load(f))
+        with self._lock:
+            for qqid, record in self._unflushed.items():
+                if record is None:
+                    users.pop(qqid, None)
+                else:
+                    users[qqid] = record
+            self._users = users
+            self._written_signature = signature
+        if self._logger is not None:
+            self._logger.info(f"Turbobot 检测到 {self.path.name} 被修改，已重新加载 {len(users)} 条绑定")
+
+    def _on_change(self):
+        # 与写盘串行：本进程刚替换文件、尚未记下签名时不会被当作外部修改
+        with self._flush_lock:
+            self._reload()
+
+    def _schedule_flush(self):
+        """标记数据已修改，并在 flush_delay 秒后合并写盘（需持有 _lock）"""
+        self._dirty = True
+        if self._flush_timer is not None:
+            return
+        self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def get(self, qqid: str) -> Optional[BindingRecord]:
+        """获取用户的绑定记录"""
+        return self._users.get(qqid)
+
+    def contains(self, qqid: str) -> bool:
+        """检查用户是否已经绑定"""
+        return qqid in self._users
+
+    def count(self) -> int:
+        """绑定记录总数"""
+        return len(self._users)
+
+    def iter_items(self) -> Iterator[Tuple[str, BindingRecord]]:
+        """遍历所有绑定记录（遍历的是调用时的快照）"""
+        return iter(list(self._users.items()))
+
+    def put(self, qqid: str, record: BindingRecord):
+        """写入用户的绑定记录"""
+        with self._lock:
+            self._users[qqid] = record
+            self._unflushed[qqid] = record
+            self._schedule_flush()
+
+    def delete(self, qqid: str) -> bool:
+        """删除用户的绑定记录，返回记录是否存在"""
+        with self._lock:
+            if self._users.pop(qqid, None) is None:
+                return False
+            self._unflushed[qqid] = None
+            self._schedule_flush()
+            return True
+
+    def apply_batch(self, ops: List[Tuple[str, Optional[BindingRecord]]]):
+        """批量写入/删除（record 为 None 表示删除），整批只安排一次写盘"""
+        with self._lock:
+            for qqid, record in ops:
+                if record is None:
+                    self._users.pop(qqid, None)
+                else:
+                    self._users[qqid] = record
+                self._unflushed[qqid] = record
+            self._schedule_flush()
+
+    def flush(self):
+        """立即将内存中的绑定数据写回磁盘"""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        """写盘（需持有 _flush_lock）"""
+        if self._watcher is not None:
+            # 监听线程可能还没来得及处理外部修改，写盘前先合并，避免覆盖
+            try:
+                self._reload()
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.error(f"Turbobot 重新加载 {self.path.name} 失败: {e}")
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            snapshot = dict(self._users)
+            unflushed, self._unflushed = self._unflushed, {}
+            self._dirty = False
+        try:
+            self._save_data(snapshot)
+        except Exception as e:
+            with self._lock:
+                self._dirty = True
+                for qqid, record in unflushed.items():
+                    self._unflushed.setdefault(qqid, record)
+            if self._logger is not None:
+                self._logger.error(f"Turbobot 绑定数据写入失败: {e}")
+
+    def close(self):
+        """关闭存储（停止监听并写回未落盘的修改）"""
+        if self._watcher is not None:
+            self._watcher.stop()
+        self.flush()
@@ -0,0 +1,248 @@
+"""绑定数据迁移工具
+
+在插件目录下执行：
+    python -m libraries.migrate import --to sqlite            # XM-Turbo.json -> database/botKey.db
+    python -m libraries.migrate import --to journal --target new.json
+    python -m libraries.migrate export --from sqlite          # database/botKey.db -> XM-Turbo.json
+    python -m libraries.migrate export --from journal --output backup.json
+
+JSON 文件按条流式解析、分批写入（SQLite 每批一个事务），导出时逐条写出，
+全程不会把整个绑定集合读入内存两次；结束后会核对记录数。
+journal 后端的导出只读取快照与日志、不做合并，可以在机器人运行时执行；
+导入到正被运行中的机器人使用的 journal 目标会被拒绝。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .binding_record import BindingRecord
+from .journal_store import JournalBindingStore
+from .sqlite_store import SqliteBindingStore
+
+_PLUGIN_DIR = Path(__file__).resolve().parent.parent
+_DEFAULT_JSON = _PLUGIN_DIR / "XM-Turbo.json"
+_DEFAULT_SQLITE = _PLUGIN_DIR / "database" / "botKey.db"
+
+
+class _JsonStream:
+    """按块读取 JSON 文本，配合 raw_decode 逐个解析值"""
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空串"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式错误：位置 {self.pos} 处应为 {char!r}")
+        self.pos += 1
+
+    def value(self):
+        """解析下一个完整的 JSON 值，缓冲区不足时继续读取"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            truncated = end == len(self.buf) or (isinstance(value, (int, float)) and self.buf[end] in ".eE")
+            if truncated and not self.eof and self._fill():
+                continue  # 数字可能被块边界截断（"12"、"1."、"1e"），读到更多内容后重新解析
+            self.pos = end
+            return value
+
+
+def iter_json_users(path) -> Iterator[Tuple[str, dict]]:
+    """流式遍历 XM-Turbo.json 中的 users，逐条产出 (qqid, record)"""
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "users":
+                stream.expect("{")
+                if stream.peek() != "}":
+                    while True:
+                        qqid = stream.value()
+                        stream.expect(":")
+                        yield qqid, stream.value()
+                        if stream.peek() != ",":
+                            break
+                        stream.expect(",")
+                stream.expect("}")
+            else:
+                stream.value()
+            if stream.peek() != ",":
+                break
+            stream.expect(",")
+        stream.expect("}")
+
+
+def _open_store(backend: str, path, read_only: bool = False):
+    """打开存储；journal 后端只读打开时不合并、不改动运行中的机器人正在使用的文件，可写打开时拒绝被占用的目标"""
+    if backend == "sqlite":
+        return SqliteBindingStore(path)
+    if backend == "journal":
+        if read_only:
+            if JournalBindingStore.in_use(path):
+                print(f"警告：{Path(path).name} 正被运行中的 Turbobot 使用，导出的是此刻的数据", file=sys.stderr)
+            return JournalBindingStore(path, read_only=True)
+        return JournalBindingStore(path, compact_interval=3600.0, compact_threshold=1 << 30)
+    raise ValueError(f"不支持的存储后端：{backend}")
+
+
+class _Progress:
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.started = time.monotonic()
+
+    def update(self, n: int):
+        self.count += n
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(f"{self.label} {self.count} 条（{self.count / elapsed:.0f} 条/秒）", file=sys.stderr)
+
+
+def import_json(source, backend: str, target, batch_size: int, merge: bool) -> int:
+    """把 XM-Turbo.json 分批导入目标存储，返回导入的记录数"""
+    if Path(source).resolve() == Path(target).resolve():
+        raise ValueError("源文件与目标相同：journal 后端直接以 XM-Turbo.json 为快照，无需迁移")
+    store = _open_store(backend, target)
+    try:
+        before = store.count()
+        if before and not merge:
+            raise ValueError(f"目标已有 {before} 条记录，如需合并请加 --merge")
+        progress = _Progress("已导入")
+        seen = set()
+        batch: List[Tuple[str, Optional[BindingRecord]]] = []
+        skipped = 0
+        for qqid, record in iter_json_users(source):
+            try:
+                batch.append((qqid, BindingRecord.from_dict(record)))
+            except (KeyError, TypeError):
+                skipped += 1
+                continue
+            seen.add(qqid)
+            if len(batch) >= batch_size:
+                store.apply_batch(batch)
+                progress.update(len(batch))
+                batch = []
+        if batch:
+            store.apply_batch(batch)
+            progress.update(len(batch))
+        store.flush()
+        after = store.count()
+        if skipped:
+            print(f"跳过 {skipped} 条缺少 bot_token/bot_key 的记录", file=sys.stderr)
+        if merge:
+            if after < len(seen):
+                raise RuntimeError(f"记录数校验失败：源文件 {len(seen)} 个用户，目标仅有 {after} 条")
+        elif after != len(seen):
+            raise RuntimeError(f"记录数校验失败：源文件 {len(seen)} 个用户，目标 {after} 条")
+        print(f"导入完成：源文件 {len(seen)} 个用户，目标共 {after} 条记录", file=sys.stderr)
+        return len(seen)
+    finally:
+        store.close()
+
+
+def export_json(backend: str, source, output, batch_size: int) -> int:
+    """把存储中的绑定逐条写出为 XM-Turbo.json 格式，返回写出的记录数"""
+    if backend == "journal" and Path(source).resolve() == Path(output).resolve():
+        raise ValueError("输出文件与源快照相同，请通过 --output 指定其他文件")
+    store = _open_store(backend, source, read_only=True)
+    output = Path(output)
+    tmp_file = output.with_name(output.name + ".tmp")
+    try:
+        expected = store.count()
+        progress = _Progress("已导出")
+        written = 0
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write('{\n  "users": {')
+            for qqid, record in store.iter_items():
+                body = json.dumps(record.to_dict(), ensure_ascii=False, indent=2).replace("\n", "\n    ")
+                f.write(("," if written else "") + f"\n    {json.dumps(qqid, ensure_ascii=False)}: {body}")
+                written += 1
+                if written % batch_size == 0:
+                    progress.update(batch_size)
+            f.write("\n  }\n}" if written else "}\n}")
+        if written % batch_size:
+            progress.update(written % batch_size)
+        if written != expected:
+            raise RuntimeError(f"记录数校验失败：存储中有 {expected} 条，写出 {written} 条")
+        os.replace(tmp_file, output)
+        print(f"导出完成：{written} 条记录 -> {output}", file=sys.stderr)
+        return written
+    finally:
+        store.close()
+        if tmp_file.exists():
+            tmp_file.unlink()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m libraries.migrate", description="Turbobot 绑定数据迁移工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="从 XM-Turbo.json 导入到其他存储后端")
+    p_import.add_argument("--to", dest="backend", choices=["sqlite", "journal"], required=True)
+    p_import.add_argument("--source", default=str(_DEFAULT_JSON), help="源 JSON 文件")
+    p_import.add_argument("--target", help="目标文件（sqlite 默认 database/botKey.db，journal 为快照路径）")
+    p_import.add_argument("--batch-size", type=int, default=5000, help="每批写入的记录数")
+    p_import.add_argument("--merge", action="store_true", help="允许目标中已有数据")
+
+    p_export = sub.add_parser("export", help="从其他存储后端导出为 XM-Turbo.json 格式")
+    p_export.add_argument("--from", dest="backend", choices=["sqlite", "journal"], required=True)
+    p_export.add_argument("--source", help="源文件（sqlite 默认 database/botKey.db，journal 默认 XM-Turbo.json）")
+    p_export.add_argument("--output", default=str(_DEFAULT_JSON), help="输出 JSON 文件")
+    p_export.add_argument("--batch-size", type=int, default=5000, help="进度输出间隔（条）")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "import":
+            target = args.target or (_DEFAULT_SQLITE if args.backend == "sqlite" else None)
+            if target is None:
+                parser.error("journal 后端需要通过 --target 指定快照路径")
+            import_json(args.source, args.backend, target, args.batch_size, args.merge)
+        else:
+            source = args.source or (_DEFAULT_SQLITE if args.backend == "sqlite" else _DEFAULT_JSON)
+            export_json(args.backend, source, args.output, args.batch_size)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"迁移失败：{e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
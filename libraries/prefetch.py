@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .turbo_api import TurboApiRateLimited, gather_requests
+
+
+class PrefetchScheduler:
+    """统计各机厅的查询频率，定期把最热门的 top_n 个机厅预先刷新进响应缓存
+
+    每次查询为机厅加 1 分，每轮结束后分数乘以 decay（默认减半），因此只有近期被反复查询的机厅（分数不低于 min_score）才会被预取；
+    due(bot_key, name, interval) 判断缓存是否会在下一轮之前过期，需要刷新的机厅调用 fetch(bot_key, name)，
+    每轮最多 budget 个请求并发发出。bot_key 为配置的专用 botKey，未配置时使用最近一次查询该机厅的用户的 botKey；
+    预取计入该 botKey 的限速额度，额度不足时跳过（计入 skipped）。
+    """
+
+    def __init__(self, fetch: Callable[[str, str], Awaitable[Any]], due: Callable[[str, str, float], bool],
+                 top_n: int, interval: float, budget: int, bot_key: Optional[str] = None,
+                 min_score: float = 2.0, decay: float = 0.5, max_tracked: int = 1024):
+        self._fetch = fetch
+        self._due = due
+        self.top_n = top_n
+        self.interval = interval
+        self.budget = budget
+        self.bot_key = bot_key
+        self.min_score = min_score
+        self.decay = decay
+        self.max_tracked = max_tracked
+        self._scores: Dict[str, float] = {}
+        self._bot_keys: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.prefetched = 0  # 实际发出的预取请求数
+        self.failed = 0
+        self.skipped = 0  # 因 botKey 限速额度不足而跳过的次数
+
+    def record(self, name: str, bot_key: str):
+        """记录一次查询"""
+        if name not in self._scores and len(self._scores) >= self.max_tracked:
+            coldest = min(self._scores, key=self._scores.__getitem__)
+            del self._scores[coldest], self._bot_keys[coldest]
+        self._scores[name] = self._scores.get(name, 0.0) + 1
+        self._bot_keys[name] = bot_key
+
+    def hot(self) -> List[Tuple[str, float]]:
+        """当前会被预取的机厅及其分数，按分数从高到低"""
+        ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        return [(name, score) for name, score in ranked[:self.top_n] if score >= self.min_score]
+
+    def _key_for(self, name: str) -> str:
+        return self.bot_key or self._bot_keys[name]
+
+    async def run_once(self):
+        """执行一轮预取，然后衰减分数"""
+        names = [name for name, _ in self.hot() if self._due(self._key_for(name), name, self.interval)][:self.budget]
+        results = await gather_requests(*(self._fetch(self._key_for(name), name) for name in names))
+        for result in results:
+            if isinstance(result, TurboApiRateLimited):
+                self.skipped += 1
+            elif isinstance(result, Exception):
+                self.failed += 1
+            else:
+                self.prefetched += 1
+        for name in list(self._scores):
+            self._scores[name] *= self.decay
+            if self._scores[name] < self.min_score * self.decay ** 2:  # 连续两轮以上无人查询，不再跟踪
+                del self._scores[name], self._bot_keys[name]
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    async def start(self):
+        """启动后台预取（在 NoneBot 启动时调用）"""
+        if self.top_n > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        """停止后台预取（在 NoneBot 关闭时调用）"""
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
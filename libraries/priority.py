@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """发往 Turbo API 的请求的调度优先级，数值越小越优先"""
+
+    INTERACTIVE = 0  # 用户指令触发、有人在等待回复的请求
+    BACKGROUND = 1  # 预取、后台刷新等没有人等待的请求
+
+
+# 当前任务发出的请求的优先级，默认视为用户指令
+_priority: ContextVar[Priority] = ContextVar("turbobot_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """在此范围内（包括其中创建的任务）发出的请求都按 BACKGROUND 调度"""
+    token = _priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
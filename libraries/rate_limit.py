@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个
+
+    reserve() 允许令牌数暂时为负，返回调用方需要等待的秒数，排队的请求按到达顺序依次放行。
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        self._refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def cancel(self):
+        """撤销一次 reserve()"""
+        self.tokens += 1
+
+
+class RateLimited(Exception):
+    """请求超出客户端限速"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """每个 botKey 一个令牌桶，另有一个全局令牌桶限制发往上游的总速率
+
+    acquire() 在等待时间不超过 max_wait 时排队等待，否则抛出 RateLimited。
+    """
+
+    def __init__(self, user_rate: float, user_burst: int, global_rate: float, global_burst: int,
+                 max_buckets: int = 4096, clock=time.monotonic):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._global: Dict[str, TokenBucket] = {}
+        self.queued = 0
+        self.rejected = 0
+
+    def _user_bucket(self, bot_key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(bot_key)
+        if bucket is None:
+            bucket = self._buckets[bot_key] = TokenBucket(self.user_rate, self.user_burst, now)
+            # 淘汰最久未使用的桶；长时间空闲的桶本来也已补满，淘汰不影响限速效果
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bot_key)
+        return bucket
+
+    def _global_bucket(self, scope: str, now: float) -> TokenBucket:
+        bucket = self._global.get(scope)
+        if bucket is None:
+            bucket = self._global[scope] = TokenBucket(self.global_rate, self.global_burst, now)
+        return bucket
+
+    def _reserve(self, scope: str, bot_key: Optional[str]) -> Tuple[List[TokenBucket], float]:
+        """在全局桶和 botKey 的桶中各预占一个令牌，返回 (桶, 需要等待的秒数)"""
+        now = self._clock()
+        buckets: List[TokenBucket] = [self._global_bucket(scope, now)]
+        if bot_key:
+            buckets.append(self._user_bucket(bot_key, now))
+        return buckets, max(bucket.reserve(now) for bucket in buckets)
+
+    def try_acquire(self, scope: str, bot_key: Optional[str]) -> bool:
+        """不等待地取得令牌，需要等待时不取得并返回 False（不计入 rejected），用于对冲这类可以不发的请求"""
+        buckets, wait = self._reserve(scope, bot_key)
+        if wait > 0:
+            for bucket in buckets:
+                bucket.cancel()
+            return False
+        return True
+
+    async def acquire(self, scope: str, bot_key: Optional[str], max_wait: float):
+        """为一次发往 scope（上游地址）的请求取得令牌"""
+        buckets, wait = self._reserve(scope, bot_key)
+        if wait > max_wait:
+            for bucket in buckets:
+                bucket.cancel()
+            self.rejected += 1
+            raise RateLimited(wait)
+        if wait > 0:
+            self.queued += 1
+            await asyncio.sleep(wait)
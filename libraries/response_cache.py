@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheEntry:
+    """一条缓存的响应；etag / last_modified 为上游返回的校验值，用于发出条件请求"""
+
+    __slots__ = ("value", "stored_at", "expires_at", "etag", "last_modified")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头；没有校验值时为空"""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """进程内 LRU + TTL 响应缓存，按接口统计命中、过期命中与未命中次数
+
+    只在事件循环中使用，无需加锁。
+    """
+
+    def __init__(self, max_entries: int = 512, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, field: str):
+        stats = self._stats.setdefault(endpoint, {"hits": 0, "stale": 0, "misses": 0})
+        stats[field] += 1
+
+    def get(self, endpoint: str, key: Hashable, max_stale: float = 0.0) -> Optional[CacheEntry]:
+        """返回缓存条目；已过期但未超过 max_stale 秒的条目同样返回（由调用方判断是否过期），否则返回 None"""
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is not None and now < entry.expires_at + max_stale:
+            self._entries.move_to_end(key)
+            self._count(endpoint, "hits" if now < entry.expires_at else "stale")
+            return entry
+        self._count(endpoint, "misses")
+        return None
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """返回缓存条目（无论是否过期），不计入统计，也不影响 LRU 顺序"""
+        return self._entries.get(key)
+
+    def expires_in(self, entry: CacheEntry) -> float:
+        """距条目过期的秒数，已过期时为负数"""
+        return entry.expires_at - self._clock()
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self._clock() < entry.expires_at
+
+    def age(self, entry: CacheEntry) -> float:
+        """条目写入至今的秒数"""
+        return self._clock() - entry.stored_at
+
+    def set(self, key: Hashable, value: Any, ttl: float,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheEntry:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        now = self._clock()
+        entry = CacheEntry(value, now, now + ttl, etag, last_modified)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各接口的命中/过期命中/未命中次数"""
+        return {endpoint: dict(counts) for endpoint, counts in self._stats.items()}
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """合并相同 key 的并发请求：同一时刻只发出一个请求，其余调用者等待并共享它的结果（或异常）
+
+    请求在独立的任务中执行，某个调用者被取消不会影响其他等待者。
+    每个请求带有优先级（数值越小越优先）：调用者不会加入优先级比自己低的进行中请求，
+    而是另发一个请求并取代它成为该 key 的共享请求，旧请求照常完成。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, int]] = {}
+        self.shared = 0  # 被合并、未实际发出的调用次数
+
+    def _done(self, key: Hashable, task: asyncio.Future):
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 所有调用者都已取消时避免“异常未被获取”的警告
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]], priority: int = 0) -> T:
+        """执行 factory()，如果相同 key、优先级不低于 priority 的请求正在进行则等待它的结果"""
+        call = self._calls.get(key)
+        if call is None or call[1] > priority:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = (task, priority)
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            task = call[0]
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,241 @@
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .binding_record import BindingRecord
+from .file_watcher import FileWatcher, file_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只能依赖单一写入进程
+    fcntl = None
+
+# 文件格式（小端）：
+#   头部    magic(8s) count(I) reserved(I)
+#   偏移表  count 个 I，按 qqid 字节序排序，指向各条记录
+#   记录    qqid_len(H) token_len(H) key_len(H) pad(2x) bind_time(q)，随后依次是三个 UTF-8 字符串
+_MAGIC = b"TBSNAP01"
+_HEADER = struct.Struct("<8sII")
+_OFFSET = struct.Struct("<I")
+_ENTRY = struct.Struct("<HHHxxq")
+
+
+def write_snapshot(path, items: Iterable[Tuple[str, BindingRecord]]) -> int:
+    """生成快照文件（写临时文件后原子替换），返回记录数"""
+    path = Path(path)
+    entries = sorted(
+        (qqid.encode("utf-8"), record.bot_token.encode("utf-8"), record.bot_key.encode("utf-8"), record.bind_time)
+        for qqid, record in items
+    )
+    offsets: List[int] = []
+    position = _HEADER.size + _OFFSET.size * len(entries)
+    for qqid, token, key, _ in entries:
+        offsets.append(position)
+        position += _ENTRY.size + len(qqid) + len(token) + len(key)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(entries), 0))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for qqid, token, key, bind_time in entries:
+            f.write(_ENTRY.pack(len(qqid), len(token), len(key), bind_time))
+            f.write(qqid)
+            f.write(token)
+            f.write(key)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    return len(entries)
+
+
+class BindingSnapshot:
+    """只读映射快照文件，二分查找 qqid；多个进程映射同一文件时共享同一份页缓存"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # (映射, 记录数) 作为一个整体替换，读者一次取出，避免监听线程重新映射时读到新映射配旧记录数
+        self._state: Tuple[Optional[mmap.mmap], int] = (None, 0)
+        self.signature = None
+        self.remap()
+
+    def remap(self):
+        """重新映射快照文件（文件被原子替换后调用）"""
+        signature = file_signature(self.path)
+        if signature is None:
+            self._state, self.signature = (None, 0), None
+            return
+        with open(self.path, "rb") as f:
+            new_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _ = _HEADER.unpack_from(new_map, 0)
+        if magic != _MAGIC:
+            new_map.close()
+            raise ValueError(f"{self.path.name} 不是有效的绑定快照文件")
+        # 整体替换引用；旧映射在没有读者引用后由垃圾回收关闭
+        self._state, self.signature = (new_map, count), signature
+
+    def __len__(self) -> int:
+        return self._state[1]
+
+    @staticmethod
+    def _read(m: mmap.mmap, offset: int) -> Tuple[bytes, BindingRecord]:
+        qqid_len, token_len, key_len, bind_time = _ENTRY.unpack_from(m, offset)
+        start = offset + _ENTRY.size
+        qqid = m[start:start + qqid_len]
+        start += qqid_len
+        token = m[start:start + token_len].decode("utf-8")
+        start += token_len
+        key = m[start:start + key_len].decode("utf-8")
+        return qqid, BindingRecord(token, key, bind_time)
+
+    def get(self, qqid: str) -> Optional[BindingRecord]:
+        """二分查找用户的绑定记录"""
+        m, count = self._state
+        if m is None:
+            return None
+        target = qqid.encode("utf-8")
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _OFFSET.unpack_from(m, _HEADER.size + _OFFSET.size * mid)[0]
+            key_len = struct.unpack_from("<H", m, offset)[0]
+            start = offset + _ENTRY.size
+            key = m[start:start + key_len]
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return self._read(m, offset)[1]
+        return None
+
+    def iter_items(self) -> Iterator[Tuple[str, BindingRecord]]:
+        """按 qqid 顺序遍历快照"""
+        m, count = self._state
+        for i in range(count if m is not None else 0):
+            offset = _OFFSET.unpack_from(m, _HEADER.size + _OFFSET.size * i)[0]
+            qqid, record = self._read(m, offset)
+            yield qqid.decode("utf-8"), record
+
+
+class SnapshotBindingStore:
+    """在主存储之外维护一份共享的只读快照，查询走内存映射的快照
+
+    写入先落到主存储（应使用支持多进程的 sqlite 后端），再延迟重新生成快照；
+    重新生成前本进程的修改保存在 _overlay 中，保证“写后即读”。
+    其他进程通过文件监听发现快照被替换后重新映射。
+    """
+
+    in_memory = True  # 查询只访问内存映射
+
+    def __init__(self, primary, path, regenerate_delay: float = 1.0, logger=None,
+                 poll_interval: float = 2.0):
+        self.primary = primary
+        self.write_behind = primary.write_behind  # 修改直接写入主存储
+        self.path = Path(path)
+        self.regenerate_delay = regenerate_delay
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._lock_file = self.path.with_name(self.path.name + ".lock")
+        self._overlay: Dict[str, Tuple[int, Optional[BindingRecord]]] = {}
+        self._seq = 0
+        self._timer: Optional[threading.Timer] = None
+        self.snapshot = BindingSnapshot(self.path)
+        if self.snapshot.signature is None or len(self.snapshot) != primary.count():
+            self.regenerate()
+        self._watcher = FileWatcher(self.path, self._on_change, poll_interval=poll_interval, logger=logger)
+        self._watcher.start()
+
+    def _on_change(self):
+        if file_signature(self.path) != self.snapshot.signature:
+            self.snapshot.remap()
+
+    def regenerate(self):
+        """从主存储重新生成快照；多个进程同时生成时用文件锁串行，保证最后替换的是最新数据"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            seq = self._seq
+        with open(self._lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                count = write_snapshot(self.path, self.primary.iter_items())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        self.snapshot.remap()
+        with self._lock:
+            # 读取主存储之前已提交的修改都包含在新快照里了
+            self._overlay = {q: v for q, v in self._overlay.items() if v[0] > seq}
+        if self._logger is not None:
+            self._logger.info(f"Turbobot 绑定快照已更新：{count} 条")
+
+    def _regenerate_in_background(self):
+        try:
+            self.regenerate()
+        except Exception as e:
+            if self._logger is not None:
+                self._logger.error(f"Turbobot 绑定快照生成失败: {e}")
+
+    def _record(self, ops: List[Tuple[str, Optional[BindingRecord]]]):
+        """记录本进程的修改并安排重新生成快照（需持有 _lock）"""
+        for qqid, record in ops:
+            self._seq += 1
+            self._overlay[qqid] = (self._seq, record)
+        if self._timer is None:
+            self._timer = threading.Timer(self.regenerate_delay, self._regenerate_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def get(self, qqid: str) -> Optional[BindingRecord]:
+        """获取用户的绑定记录"""
+        pending = self._overlay.get(qqid)
+        if pending is not None:
+            return pending[1]
+        return self.snapshot.get(qqid)
+
+    def contains(self, qqid: str) -> bool:
+        """检查用户是否已经绑定"""
+        return self.get(qqid) is not None
+
+    def count(self) -> int:
+        """绑定记录总数"""
+        return self.primary.count()
+
+    def iter_items(self) -> Iterator[Tuple[str, BindingRecord]]:
+        """遍历所有绑定记录"""
+        return self.primary.iter_items()
+
+    def put(self, qqid: str, record: BindingRecord):
+        """写入用户的绑定记录"""
+        self.apply_batch([(qqid, record)])
+
+    def delete(self, qqid: str) -> bool:
+        """删除用户的绑定记录，返回记录是否存在"""
+        existed = self.contains(qqid)
+        self.apply_batch([(qqid, None)])
+        return existed
+
+    def apply_batch(self, ops: List[Tuple[str, Optional[BindingRecord]]]):
+        """批量写入/删除（record 为 None 表示删除）"""
+        with self._lock:
+            self.primary.apply_batch(ops)
+            self._record(ops)
+
+    def flush(self):
+        """落盘主存储并立即重新生成快照"""
+        self.primary.flush()
+        if self._overlay:
+            self.regenerate()
+
+    def close(self):
+        """停止监听，生成最终快照并关闭主存储"""
+        self._watcher.stop()
+        try:
+            if self._overlay:
+                self.regenerate()
+        finally:
+            self.primary.close()
@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .binding_record import BindingRecord, parse_bind_time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS binding (
+    qqid TEXT PRIMARY KEY,
+    bot_token TEXT NOT NULL,
+    bot_key TEXT NOT NULL,
+    bind_time INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# 语句保持为固定字符串，sqlite3 模块会缓存其预编译结果
+_SELECT = "SELECT bot_token, bot_key, bind_time FROM binding WHERE qqid = ?"
+_EXISTS = "SELECT 1 FROM binding WHERE qqid = ?"
+_UPSERT = "INSERT OR REPLACE INTO binding (qqid, bot_token, bot_key, bind_time) VALUES (?, ?, ?, ?)"
+_DELETE = "DELETE FROM binding WHERE qqid = ?"
+
+
+class SqliteBindingStore:
+    """基于 SQLite（WAL 模式）的绑定存储：每次绑定/解绑只写一行"""
+
+    in_memory = False  # 查询是否只访问内存
+    write_behind = False  # 修改立即提交事务
+
+    def __init__(self, path, logger=None):
+        self.path = Path(path)
+        self._logger = logger
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._import_legacy_table()
+
+    def _import_legacy_table(self):
+        """导入旧版 botKey.db 中 user 表的数据（仅在 binding 表为空时执行一次）"""
+        conn = self._conn
+        has_legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user'"
+        ).fetchone()
+        if not has_legacy or conn.execute("SELECT 1 FROM binding LIMIT 1").fetchone():
+            return
+        conn.execute(
+            "INSERT OR IGNORE INTO binding (qqid, bot_token, bot_key, bind_time) "
+            "SELECT QQID, bot_token, bot_key, COALESCE(bind_time, 0) FROM user "
+            "WHERE QQID IS NOT NULL AND bot_token IS NOT NULL AND bot_key IS NOT NULL"
+        )
+
+    def get(self, qqid: str) -> Optional[BindingRecord]:
+        """获取用户的绑定记录"""
+        with self._lock:
+            row = self._conn.execute(_SELECT, (qqid,)).fetchone()
+        if row is None:
+            return None
+        return BindingRecord(row[0], row[1], parse_bind_time(row[2]))
+
+    def contains(self, qqid: str) -> bool:
+        """检查用户是否已经绑定"""
+        with self._lock:
+            return self._conn.execute(_EXISTS, (qqid,)).fetchone() is not None
+
+    def count(self) -> int:
+        """绑定记录总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM binding").fetchone()[0]
+
+    def iter_items(self, batch_size: int = 1000) -> Iterator[Tuple[str, BindingRecord]]:
+        """按 qqid 顺序分批遍历所有绑定记录，不会一次性读入内存"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT qqid, bot_token, bot_key, bind_time FROM binding WHERE qqid > ? ORDER BY qqid LIMIT ?",
+                    (last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for qqid, bot_token, bot_key, bind_time in rows:
+                yield qqid, BindingRecord(bot_token, bot_key, parse_bind_time(bind_time))
+            last = rows[-1][0]
+
+    def put(self, qqid: str, record: BindingRecord):
+        """写入用户的绑定记录"""
+        with self._lock:
+            self._conn.execute(_UPSERT, (qqid, record.bot_token, record.bot_key, record.bind_time))
+
+    def delete(self, qqid: str) -> bool:
+        """删除用户的绑定记录，返回记录是否存在"""
+        with self._lock:
+            return self._conn.execute(_DELETE, (qqid,)).rowcount > 0
+
+    def apply_batch(self, ops: List[Tuple[str, Optional[BindingRecord]]]):
+        """批量写入/删除（record 为 None 表示删除），整批在一个事务中提交"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for qqid, record in ops:
+                    if record is None:
+                        self._conn.execute(_DELETE, (qqid,))
+                    else:
+                        self._conn.execute(_UPSERT, (qqid, record.bot_token, record.bot_key, record.bind_time))
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def flush(self):
+        """将 WAL 中的内容合并回主数据库文件"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,508 @@
+import asyncio
+import math
+from typing import Any, Awaitable, Dict, Hashable, List, Optional, Set, Tuple
+
+import httpx
+
+from ..config import Config
+from . import deadline
+from .adaptive_limit import AdaptiveLimiter, Overloaded
+from .circuit_breaker import CircuitBreaker, CircuitOpen, backoff_delay
+from .hedging import HedgeBudget, LatencyTracker, hedged
+from .http_client import send_request
+from .priority import Priority, background_priority, current_priority
+from .rate_limit import RateLimited, RateLimiter
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+
+
+class TurboApiError(Exception):
+    """Turbo API 返回了非 200 的状态码"""
+
+    def __init__(self, status_code: int, message: Optional[str] = None, text: str = ""):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.message = message
+        self.text = text
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "TurboApiError":
+        message = None
+        if response.status_code == 500:
+            try:
+                message = response.json().get("message")
+            except (ValueError, AttributeError):
+                pass
+        return cls(response.status_code, message, response.text)
+
+    def describe(self, action: str, bad_request: Optional[str] = None) -> str:
+        """转为回复给用户的提示，action 如“获取好友列表”；bad_request 为 400 时的提示，未提供时按其他状态码处理"""
+        if self.status_code == 400 and bad_request:
+            return bad_request
+        if self.status_code == 401:
+            return "请求的Token缺失或不合法，请检查权限。"
+        if self.status_code == 403:
+            return f"权限不足，无法{action}。"
+        if self.status_code == 410:
+            return "该用户已被封禁，请联系管理员。"
+        if self.status_code == 500:
+            return self.message or "服务器内部错误"
+        return f"{action}失败，HTTP响应状态码为 {self.status_code}。"
+
+
+class TurboApiRateLimited(TurboApiError):
+    """请求被客户端限速拦下，没有发往上游"""
+
+    def __init__(self, retry_after: float, silent: bool = False):
+        super().__init__(429)
+        self.retry_after = retry_after
+        self.silent = silent
+
+    def describe(self, action: str, bad_request: Optional[str] = None) -> str:
+        """shed 模式下不回复（返回空串）"""
+        if self.silent:
+            return ""
+        return f"请求过于频繁，请 {math.ceil(self.retry_after)} 秒后再试。"
+
+
+class TurboApiUnavailable(TurboApiError):
+    """接口熔断中，请求没有发往上游"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(503)
+        self.retry_after = retry_after
+
+    def describe(self, action: str, bad_request: Optional[str] = None) -> str:
+        return f"Turbo 服务暂时不可用，请 {math.ceil(self.retry_after)} 秒后再试。"
+
+
+class TurboApiTimeout(TurboApiError):
+    """请求超时，或指令的总时长上限（command_deadline）已用完"""
+
+    def __init__(self):
+        super().__init__(504)
+
+    def describe(self, action: str, bad_request: Optional[str] = None) -> str:
+        return f"{action}超时，请稍后再试。"
+
+
+class TurboApiDeadlineExceeded(TurboApiTimeout):
+    """指令的总时长上限已用完：限制本次请求的是调用方剩余的时间而不是接口超时，不计入熔断器和自适应并发"""
+
+
+async def gather_requests(*requests: Awaitable) -> List[Any]:
+    """并发执行互不依赖的请求，按传入顺序返回各自的结果；失败的请求在对应位置返回异常对象，不影响其他请求
+
+    各请求共享调用方的指令截止时间，总耗时取决于最慢的一个而不是所有请求之和。
+    """
+    return list(await asyncio.gather(*requests, return_exceptions=True))
+
+
+class TurboApiOverloaded(TurboApiError):
+    """上游拥塞，请求在自适应并发限制前排队超时，没有发往上游"""
+
+    def __init__(self):
+        super().__init__(503)
+
+    def describe(self, action: str, bad_request: Optional[str] = None) -> str:
+        return f"Turbo 服务繁忙，{action}失败，请稍后再试。"
+
+
+# 网关类错误视为上游不健康：GET 请求会重试，并计入熔断器的失败次数
+_RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+
+class TurboApiClient:
+    """Turbo API 的统一入口：拼接地址、附加 BotKey、检查状态码并解码响应
+
+    非 200 响应抛出 TurboApiError，网络错误原样抛出 httpx 的异常。
+    Config.response_cache_policies 中列出的只读接口会在 TTL 内直接返回缓存的结果；
+    相同的 GET 请求（缓存 key 相同）同时只会发出一个，其余调用者共享结果。
+    Config.response_stale_policies 中的接口过期后仍先返回旧数据，同时在后台刷新。
+    上游返回 ETag / Last-Modified 时会连同数据一起保存，再次查询时发出条件请求，304 直接沿用保存的数据而不再解码；
+    未配置缓存策略的接口的数据只为条件请求保存，放在单独的 validators 中，不会挤占响应缓存。
+    每个实际发出的请求都要先通过按 botKey 和按上游地址的令牌桶限速（Config.rate_limit_*）。
+    GET 请求遇到网络错误或网关错误时按指数退避重试；每个接口有独立的熔断器，上游持续故障时直接失败。
+    每次请求的超时取 Config.api_timeouts，并且不会超过当前指令剩余的时间（见 deadline.command_deadline）；
+    因指令时间用完而超时（TurboApiDeadlineExceeded）不说明上游不健康，不计入熔断器和自适应并发。
+    所有请求都要先取得自适应并发限制的配额（Config.adaptive_concurrency_*），上游出现 5xx、超时或明显变慢时自动降低并发。
+    Config.hedge_paths 中的查询在耗时超过近期 p95 后再发出一个相同的请求，取先返回的结果，对冲比例受 Config.hedge_max_ratio 限制；
+    对冲请求同样计入限速和并发配额，但不排队，令牌或配额不足时不对冲。
+    后台刷新和预取（见 prefetch.PrefetchScheduler）按 Priority.BACKGROUND 调度：并发配额优先让给用户指令；
+    它们同样计入所用 botKey 的限速额度，但从不排队，额度不足时直接放弃（抛出 TurboApiRateLimited）。
+    """
+
+    def __init__(self):
+        self.cache = ResponseCache(Config.response_cache_size)
+        self.validators = ResponseCache(Config.conditional_cache_size)
+        self.flight = SingleFlight()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.limiter = RateLimiter(
+            Config.rate_limit_user_rate, Config.rate_limit_user_burst,
+            Config.rate_limit_global_rate, Config.rate_limit_global_burst,
+        )
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.not_modified = 0  # 条件请求得到 304 的次数
+        self.latency = LatencyTracker()
+        self.concurrency = AdaptiveLimiter(
+            Config.adaptive_concurrency_initial, Config.adaptive_concurrency_min, Config.adaptive_concurrency_max,
+            Config.background_concurrency_share,
+        )
+        self.hedge_budget = HedgeBudget(Config.hedge_max_ratio)
+
+    async def _throttle(self, bot_key: Optional[str], priority: Priority):
+        """按 Config.rate_limit_mode 处理超出限速的请求：queue 排队等待，reply 回复提示，shed 直接丢弃
+
+        后台请求不排队，额度不足时直接放弃，不会挤占用户指令的额度。
+        """
+        mode = Config.rate_limit_mode
+        max_wait = Config.rate_limit_max_wait if mode == "queue" and priority is Priority.INTERACTIVE else 0.0
+        budget = deadline.remaining()
+        if budget is not None:
+            max_wait = min(max_wait, budget)
+        try:
+            await self.limiter.acquire(Config.api_base_url, bot_key, max_wait)
+        except RateLimited as e:
+            raise TurboApiRateLimited(e.retry_after, silent=mode == "shed")
+
+    async def _request(self, method: str, path: str, bot_key: Optional[str] = None, *,
+                       params: Optional[Dict[str, Any]] = None, json: Any = None,
+                       headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """headers 为条件请求头时，304 与 200 一样正常返回"""
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            raise TurboApiDeadlineExceeded()
+        breaker = self.breakers.get(path)
+        if breaker is None:
+            breaker = self.breakers[path] = CircuitBreaker(Config.circuit_failure_threshold, Config.circuit_reset_timeout)
+        try:
+            probe = breaker.acquire()
+        except CircuitOpen as e:
+            raise TurboApiUnavailable(e.retry_after)
+
+        ok = None
+        try:
+            response = await self._send(method, path, bot_key, params, json, headers)
+            ok = response.status_code not in _RETRYABLE_STATUS
+        except TurboApiDeadlineExceeded:
+            raise  # 调用方的时间用完了，不能说明上游不健康
+        except (httpx.TransportError, TurboApiTimeout):
+            ok = False
+            raise
+        finally:
+            breaker.release(probe, ok)
+        if response.status_code != 200 and not (headers and response.status_code == 304):
+            raise TurboApiError.from_response(response)
+        return response
+
+    def _timeout(self, path: str) -> Tuple[httpx.Timeout, float, bool]:
+        """本次请求的 httpx 超时设置、总超时（秒）以及总超时是否被指令剩余时间截短
+
+        指令时间已用完时抛出 TurboApiDeadlineExceeded。
+        """
+        connect, read, total = Config.api_timeouts.get(path, Config.api_timeouts["default"])
+        budget = deadline.remaining()
+        clipped = budget is not None and budget < total
+        if clipped:
+            total = budget
+        if total <= 0:
+            raise TurboApiDeadlineExceeded()
+        return httpx.Timeout(total, connect=min(connect, total), read=min(read, total)), total, clipped
+
+    async def _acquire_slot(self, priority: Priority):
+        """按优先级排队等待自适应并发配额，最多 Config.adaptive_max_wait 秒且不超过指令剩余时间"""
+        max_wait = Config.adaptive_max_wait
+        budget = deadline.remaining()
+        if budget is not None:
+            max_wait = min(max_wait, budget)
+        try:
+            await self.concurrency.acquire(max_wait, priority)
+        except Overloaded:
+            raise TurboApiOverloaded()
+
+    def _is_slow(self, path: str, elapsed: float) -> bool:
+        """耗时超过该接口近期中位数的 Config.adaptive_slow_ratio 倍时视为拥塞信号"""
+        median = self.latency.percentile(path, 0.5)
+        return median is not None and elapsed > median * Config.adaptive_slow_ratio
+
+    def _hedge_delay(self, method: str, path: str) -> Optional[float]:
+        """Config.hedge_paths 中的 GET 请求在耗时超过该接口近期的 Config.hedge_percentile 分位数后对冲；样本不足时不对冲"""
+        if method != "GET" or path not in Config.hedge_paths:
+            return None
+        self.hedge_budget.on_request()
+        return self.latency.percentile(path, Config.hedge_percentile)
+
+    async def _send(self, method: str, path: str, bot_key: Optional[str], params, json,
+                    extra_headers: Optional[Dict[str, str]]) -> httpx.Response:
+        """发出请求；只有 GET 这类幂等请求才会在网络错误或网关错误时重试，重试等待不会超过指令剩余时间"""
+        attempts = max(1, Config.retry_max_attempts) if method == "GET" else 1
+        headers = dict(extra_headers or {})
+        if bot_key:
+            headers["Authorization"] = f"BotKey {bot_key}"
+        for attempt in range(1, attempts + 1):
+            if attempt > 1:
+                delay = backoff_delay(attempt - 1, Config.retry_base_delay, Config.retry_max_delay)
+                budget = deadline.remaining()
+                if budget is not None and budget <= delay:
+                    break
+                self.retries += 1
+                await asyncio.sleep(delay)
+            priority = current_priority()
+            await self._throttle(bot_key, priority)
+            await self._acquire_slot(priority)
+            congested = None  # 被取消或超出指令时长时不调整并发上限
+            try:
+                timeout, total, clipped = self._timeout(path)
+
+                def request():
+                    return send_request(
+                        method, f"{Config.api_base_url}{path}", params=params, json=json, headers=headers, timeout=timeout
+                    )
+
+                def admit_hedge() -> bool:
+                    # 对冲请求同样计入限速和并发配额，但不等待：任一不可用时不对冲
+                    if not self.concurrency.try_acquire(priority):
+                        return False
+                    if not self.limiter.try_acquire(Config.api_base_url, bot_key):
+                        self.concurrency.release(None, priority)
+                        return False
+                    return True
+
+                def release_hedge():
+                    self.concurrency.release(None, priority)
+
+                hedge_delay = self._hedge_delay(method, path)
+                started = asyncio.get_running_loop().time()
+                response = await asyncio.wait_for(
+                    request() if hedge_delay is None
+                    else hedged(request, hedge_delay, self.hedge_budget, admit_hedge, release_hedge),
+                    total,
+                )
+                elapsed = asyncio.get_running_loop().time() - started
+                congested = response.status_code in _RETRYABLE_STATUS or self._is_slow(path, elapsed)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                if clipped and isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)):
+                    # 超时由指令剩余时间决定，不是上游变慢：不调整并发上限，也不再重试
+                    raise TurboApiDeadlineExceeded() from e
+                congested = True
+                error = e
+                continue
+            finally:
+                self.concurrency.release(congested, priority)
+            self.latency.record(path, elapsed)
+            if response.status_code not in _RETRYABLE_STATUS or attempt == attempts:
+                return response
+            error = None
+        if error is None:
+            return response
+        if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+            raise TurboApiTimeout() from error
+        raise error
+
+    async def _get_json(self, path: str, bot_key: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return (await self._get_json_with_age(path, bot_key, params))[0]
+
+    async def _get_json_with_age(self, path: str, bot_key: str,
+                                 params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Optional[float]]:
+        """返回 (数据, 数据年龄)；只有返回的是已过期的旧数据时才给出年龄（秒），否则为 None"""
+        key, ttl = self._cache_key(path, bot_key, params)
+
+        async def fetch():
+            # 共享请求可能被多条指令等待，不受发起它的那条指令的截止时间约束，见 _await_flight
+            deadline.clear_deadline()
+            return await self._fetch_json(path, bot_key, params, key, ttl)
+
+        if ttl is not None:
+            entry = self.cache.get(path, key, Config.response_stale_policies.get(path, 0.0))
+            if entry is not None:
+                if self.cache.is_fresh(entry):
+                    return entry.value, None
+                self._refresh(key, fetch)
+                return entry.value, self.cache.age(entry)
+        return await self._await_flight(key, fetch), None
+
+    async def _await_flight(self, key: Hashable, fetch) -> Any:
+        """通过 single-flight 发出或加入请求，每个调用者最多等到自己的指令截止
+
+        等待超时只是放弃等待，共享请求会继续完成并写入缓存，不影响其他调用者。
+        """
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            raise TurboApiDeadlineExceeded()
+        # 用户指令不会加入预取、后台刷新等 BACKGROUND 请求，以免被排在其他用户指令之后
+        flight = self.flight.do(key, fetch, current_priority())
+        if budget is None:
+            return await flight
+        try:
+            return await asyncio.wait_for(flight, budget)
+        except asyncio.TimeoutError:
+            raise TurboApiDeadlineExceeded()
+
+    @staticmethod
+    def _cache_key(path: str, bot_key: str, params: Optional[Dict[str, Any]]) -> Tuple[Hashable, Optional[float]]:
+        """返回 (缓存 key, 缓存秒数)；未配置缓存策略的接口缓存秒数为 None，key 仍用于合并并发请求"""
+        policy = Config.response_cache_policies.get(path)
+        ttl, per_user = policy if policy is not None else (None, True)
+        return (path, tuple(sorted((params or {}).items())), bot_key if per_user else None), ttl
+
+    def _refresh(self, key, fetch):
+        """在后台刷新过期条目；同一 key 的刷新与前台请求共用一次 single-flight"""
+        if key in self.flight:
+            return
+        with background_priority():
+            task = asyncio.ensure_future(self.flight.do(key, fetch, Priority.BACKGROUND))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refresh_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()  # 刷新失败时继续返回旧数据，直到超过最长过期时间
+
+    async def _fetch_json(self, path: str, bot_key: str, params: Optional[Dict[str, Any]], key, ttl: Optional[float]) -> Any:
+        # 保存过校验值的响应先发条件请求
+        store = self.cache if ttl is not None else self.validators
+        previous = store.peek(key) if Config.conditional_requests else None
+        validators = previous.validators() if previous is not None else None
+        response = await self._request("GET", path, bot_key, params=params, headers=validators)
+        if response.status_code == 304:
+            self.not_modified += 1
+            data = previous.value
+            etag = response.headers.get("ETag", previous.etag)
+            last_modified = response.headers.get("Last-Modified", previous.last_modified)
+        else:
+            data = response.json()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        if not Config.conditional_requests:
+            etag = last_modified = None
+        if ttl is not None:
+            self.cache.set(key, data, ttl, etag, last_modified)
+        elif etag is not None or last_modified is not None:
+            self.validators.set(key, data, 0.0, etag, last_modified)
+        return data
+
+    def _prefetch_due(self, path: str, bot_key: str, params: Optional[Dict[str, Any]], horizon: float) -> bool:
+        """缓存条目不存在或将在 horizon 秒内过期时返回 True；未配置缓存策略的接口不预取"""
+        key, ttl = self._cache_key(path, bot_key, params)
+        if ttl is None:
+            return False
+        entry = self.cache.peek(key)
+        return entry is None or self.cache.expires_in(entry) < horizon
+
+    async def _prefetch(self, path: str, bot_key: str, params: Optional[Dict[str, Any]]):
+        """以 BACKGROUND 优先级请求并写入缓存，与同一 key 的前台请求共用一次 single-flight"""
+        key, ttl = self._cache_key(path, bot_key, params)
+        with background_priority():
+            await self.flight.do(key, lambda: self._fetch_json(path, bot_key, params, key, ttl), Priority.BACKGROUND)
+
+    async def _post(self, path: str, bot_key: str, json: Any = None):
+        await self._request("POST", path, bot_key, json=json)
+
+    # 账号绑定
+    async def bind(self, bot_token: str, bot_name: str) -> Dict[str, Any]:
+        response = await self._request("POST", "/bot/bind", json={"botToken": bot_token, "botName": bot_name})
+        return response.json()
+
+    async def unbind(self, bot_key: str):
+        await self._request("POST", "/bot/unbind", json={"botKey": bot_key})
+
+    # 名称
+    async def set_maimai_name(self, bot_key: str, maimai_name: str):
+        await self._post("/web/setMaimaiName", bot_key, {"maimaiName": maimai_name})
+
+    async def reset_maimai_name(self, bot_key: str):
+        await self._post("/web/resetMaimaiName", bot_key)
+
+    async def show_maimai_name(self, bot_key: str) -> str:
+        return (await self._request("GET", "/web/showMaimaiName", bot_key)).text
+
+    # 功能票
+    async def set_tickets(self, bot_key: str, ticket_id: int):
+        await self._post("/web/setTickets", bot_key, {"ticketId": ticket_id})
+
+    async def reset_tickets(self, bot_key: str):
+        await self._post("/web/resetTickets", bot_key)
+
+    async def current_tickets(self, bot_key: str) -> Dict[str, Any]:
+        return await self._get_json("/web/currentTickets", bot_key)
+
+    # 网络与机厅
+    async def show_server_requests(self, bot_key: str) -> Tuple[Dict[str, Any], Optional[float]]:
+        """返回 (数据, 旧数据的年龄)，见 _get_json_with_age"""
+        return await self._get_json_with_age("/web/showServerRequests", bot_key)
+
+    async def arcade_info_detail(self, bot_key: str, arcade_name: str) -> Tuple[Dict[str, Any], Optional[float]]:
+        """返回 (数据, 旧数据的年龄)，见 _get_json_with_age"""
+        return await self._get_json_with_age("/web/arcadeInfoDetail", bot_key, {"arcadeName": arcade_name})
+
+    def arcade_info_due(self, bot_key: str, arcade_name: str, horizon: float) -> bool:
+        return self._prefetch_due("/web/arcadeInfoDetail", bot_key, {"arcadeName": arcade_name}, horizon)
+
+    async def prefetch_arcade_info(self, bot_key: str, arcade_name: str):
+        await self._prefetch("/web/arcadeInfoDetail", bot_key, {"arcadeName": arcade_name})
+
+    async def show_network_status(self, bot_key: str, arcade_name: str) -> Dict[str, Any]:
+        return await self._get_json("/web/showNetworkStatus", bot_key, {"arcadeName": arcade_name})
+
+    # 用户
+    async def show_permission(self, bot_key: str) -> str:
+        response = await self._request("GET", "/permission/showPermission", bot_key)
+        return response.text.strip().replace('"', '')
+
+    async def show_turbo_permission(self, bot_key: str) -> list:
+        return await self._get_json("/web/showTurboPermission", bot_key)
+
+    async def user(self, bot_key: str) -> Dict[str, Any]:
+        return await self._get_json("/web/user", bot_key)
+
+    async def records(self, bot_key: str, page: int) -> Dict[str, Any]:
+        return await self._get_json("/web/records", bot_key, {"page": page})
+
+    async def show_user_settings(self, bot_key: str) -> Dict[str, Any]:
+        return await self._get_json("/web/showUserSettings", bot_key)
+
+    async def set_user_settings(self, bot_key: str, settings: Dict[str, Any]):
+        await self._post("/web/setUserSettings", bot_key, settings)
+
+    async def set_avatar(self, bot_key: str, avatar_base64: str):
+        await self._post("/web/setAvatar", bot_key, {"avatarBase64": avatar_base64})
+
+    async def reset_avatar(self, bot_key: str):
+        await self._post("/web/resetAvatar", bot_key)
+
+    async def set_friend_search_policy(self, bot_key: str, allow_search: bool):
+        await self._post("/web/setFriendSearchPolicy", bot_key, {"allowSearch": allow_search})
+
+    # 好友
+    async def show_friends(self, bot_key: str, page: int) -> Dict[str, Any]:
+        return await self._get_json("/web/showFriends", bot_key, {"page": page})
+
+    async def show_friend_requests(self, bot_key: str) -> list:
+        return await self._get_json("/web/showFriendRequests", bot_key)
+
+    async def add_friend(self, bot_key: str, turbo_name: str):
+        await self._post("/web/addFriend", bot_key, {"turboName": turbo_name})
+
+    async def accept_friend(self, bot_key: str, turbo_name: str):
+        await self._post("/web/acceptFriend", bot_key, {"turboName": turbo_name})
+
+    async def deny_friend(self, bot_key: str, turbo_name: str):
+        await self._post("/web/denyFriend", bot_key, {"turboName": turbo_name})
+
+    async def remove_friend(self, bot_key: str, turbo_name: str):
+        await self._post("/web/removeFriend", bot_key, {"turboName": turbo_name})
+
+    # 对手
+    async def show_rivals(self, bot_key: str, page: int) -> Dict[str, Any]:
+        return await self._get_json("/web/showRivals", bot_key, {"page": page})
+
+    async def add_rival(self, bot_key: str, turbo_name: str):
+        await self._post("/web/addRival", bot_key, {"turboName": turbo_name})
+
+    async def remove_rival(self, bot_key: str, turbo_name: str):
+        await self._post("/web/removeRival", bot_key, {"turboName": turbo_name})
+
+
+turbo_api = TurboApiClient()
@@ -0,0 +1,244 @@
+import asyncio
+
+import pytest
+
+from libraries.adaptive_limit import AdaptiveLimiter, Overloaded
+from libraries.priority import Priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(initial=4, min_limit=2, max_limit=6, **kwargs) -> AdaptiveLimiter:
+    return AdaptiveLimiter(initial, min_limit, max_limit, **kwargs)
+
+
+async def _hold(limiter: AdaptiveLimiter, n: int):
+    for _ in range(n):
+        await limiter.acquire(0)
+
+
+def test_additive_increase_capped_at_max():
+    async def main():
+        limiter = _limiter()
+        await _hold(limiter, 1)
+        limiter.release(False)
+        assert limiter.limit == pytest.approx(4.25)
+        for _ in range(100):
+            await limiter.acquire(0)
+            limiter.release(False)
+        assert limiter.limit == 6
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_multiplicative_decrease_once_per_cooldown():
+    async def main():
+        clock = FakeClock()
+        limiter = _limiter(initial=8, min_limit=1, max_limit=8, backoff=0.5, cooldown=1.0, clock=clock)
+        await _hold(limiter, 5)
+        limiter.release(True)
+        assert limiter.limit == 4
+        limiter.release(True)  # 同一批失败只下调一次
+        assert limiter.limit == 4
+        clock.now += 1.0
+        limiter.release(True)
+        assert limiter.limit == 2
+        clock.now += 1.0
+        limiter.release(True)
+        clock.now += 1.0
+        limiter.release(True)
+        assert limiter.limit == 1  # 不低于 min_limit
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_unknown_outcome_keeps_limit():
+    async def main():
+        limiter = _limiter()
+        await _hold(limiter, 1)
+        limiter.release(None)
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_initial_limit_clamped():
+    assert _limiter(initial=100).limit == 6
+    assert _limiter(initial=0).limit == 2
+
+
+def test_waiters_served_in_arrival_order():
+    async def main():
+        limiter = _limiter(initial=2)
+        await _hold(limiter, 2)
+        order = []
+
+        async def worker(name):
+            await limiter.acquire(5)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(worker(i)) for i in range(4)]
+        await asyncio.sleep(0)
+        assert limiter.queued(0) == 4
+        for _ in range(4):
+            limiter.release(None)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2, 3]
+        assert limiter.in_flight == 2
+
+    asyncio.run(main())
+
+
+def test_new_request_does_not_overtake_queue():
+    async def main():
+        limiter = _limiter(initial=2)
+        await _hold(limiter, 2)
+        waiter = asyncio.ensure_future(limiter.acquire(5))
+        await asyncio.sleep(0)
+        limiter.release(None)  # 配额交给排队者，而不是随后到达的请求
+        with pytest.raises(Overloaded):
+            await limiter.acquire(0)
+        await waiter
+        assert limiter.in_flight == 2
+
+    asyncio.run(main())
+
+
+def test_overloaded_after_max_wait():
+    async def main():
+        limiter = _limiter(initial=2)
+        await _hold(limiter, 2)
+        with pytest.raises(Overloaded) as info:
+            await limiter.acquire(0)
+        assert info.value.waited == 0
+        with pytest.raises(Overloaded) as info:
+            await limiter.acquire(0.01)
+        assert info.value.waited == 0.01
+        assert limiter.rejected == 2
+        assert limiter.queued(0) == 0
+        assert limiter.in_flight == 2
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def main():
+        limiter = _limiter(initial=2)
+        await _hold(limiter, 2)
+
+        waiting = asyncio.ensure_future(limiter.acquire(5))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert limiter.queued(0) == 0
+
+        # 已分到配额、尚未恢复运行时被取消：配额要归还
+        granted = asyncio.ensure_future(limiter.acquire(5))
+        await asyncio.sleep(0)
+        limiter.release(None)
+        assert limiter.in_flight == 2
+        granted.cancel()
+        result, = await asyncio.gather(granted, return_exceptions=True)
+        if not isinstance(result, asyncio.CancelledError):
+            # 部分 Python 版本的 wait_for 在结果已就绪时吞掉取消并正常返回，此时配额归调用者所有
+            limiter.release(None)
+        assert limiter.in_flight == 1
+
+        limiter.release(None)
+        assert limiter.in_flight == 0
+        await _hold(limiter, 2)
+
+    asyncio.run(main())
+
+
+def test_interactive_waiters_woken_before_background():
+    async def main():
+        limiter = _limiter(initial=2, background_share=1.0)
+        await _hold(limiter, 2)
+        order = []
+
+        async def worker(name, priority):
+            await limiter.acquire(5, priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(worker("background", Priority.BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(worker("interactive", Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+        limiter.release(None)  # 配额在 release 中直接交给排队者
+        assert limiter.running(Priority.INTERACTIVE) == 2
+        assert limiter.running(Priority.BACKGROUND) == 0
+        limiter.release(None)
+        await asyncio.gather(*tasks)
+        assert order == ["interactive", "background"]
+
+    asyncio.run(main())
+
+
+def test_background_does_not_skip_queued_interactive():
+    async def main():
+        limiter = _limiter(initial=2, background_share=1.0)
+        await _hold(limiter, 2)
+        interactive = asyncio.ensure_future(limiter.acquire(5, Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await limiter.acquire(0, Priority.BACKGROUND)
+        limiter.release(None)
+        await interactive
+        assert limiter.running(Priority.BACKGROUND) == 0
+
+    asyncio.run(main())
+
+
+def test_background_share_cap():
+    async def main():
+        limiter = _limiter(initial=4, background_share=0.5)
+        await limiter.acquire(0, Priority.BACKGROUND)
+        await limiter.acquire(0, Priority.BACKGROUND)
+        with pytest.raises(Overloaded):
+            await limiter.acquire(0, Priority.BACKGROUND)
+        # 后台请求占满份额时，前台请求仍能取得剩余配额
+        await _hold(limiter, 2)
+        assert limiter.running(Priority.BACKGROUND) == 2
+        assert limiter.running(Priority.INTERACTIVE) == 2
+
+        # 后台等待者只在后台份额空出时放行
+        waiter = asyncio.ensure_future(limiter.acquire(5, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        limiter.release(None, Priority.INTERACTIVE)
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        limiter.release(None, Priority.BACKGROUND)
+        await waiter
+        assert limiter.running(Priority.BACKGROUND) == 2
+
+        # 份额至少为 1，上限很低时后台请求也不会饿死
+        small = _limiter(initial=1, min_limit=1, background_share=0.5)
+        await small.acquire(0, Priority.BACKGROUND)
+
+    asyncio.run(main())
+
+
+def test_timed_out_interactive_unblocks_background():
+    async def main():
+        limiter = _limiter(initial=2, background_share=1.0)
+        await _hold(limiter, 2)
+        background = asyncio.ensure_future(limiter.acquire(5, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await limiter.acquire(0.01, Priority.INTERACTIVE)
+        limiter.release(None)
+        await background
+        assert limiter.running(Priority.BACKGROUND) == 1
+
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+import pytest
+
+from libraries.circuit_breaker import CircuitBreaker, CircuitOpen, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        breaker.release(breaker.acquire(), False)
+
+
+def test_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(3, 10.0, clock=clock)
+    _fail(breaker, 2)
+    breaker.release(breaker.acquire(), True)  # 成功后重新计数
+    _fail(breaker, 2)
+    assert breaker.state == "closed"
+    _fail(breaker)
+    assert breaker.state == "open"
+    assert breaker.opened == 1
+
+    clock.now += 4.0
+    with pytest.raises(CircuitOpen) as info:
+        breaker.acquire()
+    assert info.value.retry_after == pytest.approx(6.0)
+
+
+def test_half_open_allows_a_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 10.0, clock=clock)
+    _fail(breaker)
+    clock.now += 10.0
+    assert breaker.state == "half_open"
+    probe = breaker.acquire()
+    assert probe
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+
+    breaker.release(probe, True)
+    assert breaker.state == "closed"
+    assert breaker.acquire() is False
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(3, 10.0, clock=clock)
+    _fail(breaker, 3)
+    clock.now += 10.0
+    breaker.release(breaker.acquire(), False)
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+    clock.now += 9.0
+    assert breaker.state == "open"
+
+
+def test_inconclusive_probe_frees_the_probe_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 10.0, clock=clock)
+    _fail(breaker)
+    clock.now += 10.0
+    breaker.release(breaker.acquire(), None)  # 例如被取消
+    assert breaker.state == "half_open"
+    assert breaker.acquire()
+
+
+def test_inconclusive_results_do_not_count():
+    breaker = CircuitBreaker(2, 10.0, clock=FakeClock())
+    _fail(breaker)
+    for _ in range(5):
+        breaker.release(breaker.acquire(), None)
+    assert breaker.state == "closed"
+    _fail(breaker)
+    assert breaker.state == "open"
+
+
+def test_backoff_delay_is_capped(monkeypatch):
+    monkeypatch.setattr("libraries.circuit_breaker.random.uniform", lambda low, high: high)
+    assert [backoff_delay(n, 0.5, 3.0) for n in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
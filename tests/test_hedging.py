@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from libraries.hedging import HedgeBudget, LatencyTracker, hedged
+
+
+def _budget(credit: float = 1.0) -> HedgeBudget:
+    budget = HedgeBudget(credit)
+    budget.on_request()
+    return budget
+
+
+def _factory(delays, calls: list):
+    async def request():
+        n = len(calls)
+        calls.append(n)
+        delay = delays[n]
+        await asyncio.sleep(abs(delay))
+        if delay < 0:
+            raise ValueError(f"request {n} failed")
+        return n
+
+    return request
+
+
+def test_fast_request_is_not_hedged():
+    async def main():
+        calls = []
+        budget = _budget()
+        assert await hedged(_factory([0.0], calls), 0.05, budget) == 0
+        assert calls == [0]
+        assert budget.hedged == 0
+
+    asyncio.run(main())
+
+
+def test_slow_request_is_hedged_and_first_success_wins():
+    async def main():
+        calls = []
+        budget = _budget()
+        assert await hedged(_factory([0.5, 0.01], calls), 0.01, budget) == 1
+        assert budget.hedged == 1
+
+        calls = []
+        assert await hedged(_factory([-0.03, 0.05], calls), 0.01, _budget()) == 1  # 先返回的失败了，采用另一个
+
+        with pytest.raises(ValueError, match="request 0"):
+            await hedged(_factory([-0.03, -0.05], []), 0.01, _budget())
+
+    asyncio.run(main())
+
+
+def test_no_hedge_without_budget():
+    async def main():
+        calls = []
+        assert await hedged(_factory([0.05], calls), 0.01, HedgeBudget(0.5)) == 0
+        assert calls == [0]
+
+    asyncio.run(main())
+
+
+def test_admit_refusal_refunds_budget():
+    async def main():
+        calls = []
+        budget = _budget()
+        assert await hedged(_factory([0.05], calls), 0.01, budget, admit=lambda: False) == 0
+        assert calls == [0]
+        assert budget.hedged == 0
+        assert budget.try_spend()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("delays, expected", [([0.5, 0.01], 1), ([0.03, 0.5], 0)])
+def test_admitted_hedge_releases_when_done_or_cancelled(delays, expected):
+    async def main():
+        held = []
+        result = await hedged(_factory(delays, []), 0.01, _budget(),
+                              admit=lambda: held.append(1) or True, release=held.pop)
+        await asyncio.sleep(0.01)  # 等待被取消的对冲请求执行完成回调
+        assert result == expected
+        assert held == []
+
+    asyncio.run(main())
+
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=10, min_samples=3)
+    tracker.record("/a", 1.0)
+    tracker.record("/a", 2.0)
+    assert tracker.percentile("/a", 0.5) is None
+    for seconds in [3.0, 4.0, 5.0]:
+        tracker.record("/a", seconds)
+    assert tracker.percentile("/a", 0.5) == 3.0
+    assert tracker.percentile("/a", 1.0) == 5.0
+    assert tracker.percentile("/b", 0.5) is None
@@ -0,0 +1,134 @@
+import json
+import os
+
+import pytest
+
+from libraries.binding_record import BindingRecord
+from libraries.journal_store import JournalBindingStore
+
+
+def _record(n: int) -> BindingRecord:
+    return BindingRecord(f"token{n}", f"key{n}", 1700000000 + n)
+
+
+def _open(path) -> JournalBindingStore:
+    # 关闭后台定时合并，测试中只在显式调用时合并
+    return JournalBindingStore(path, compact_interval=3600.0, compact_threshold=1 << 30)
+
+
+def _crash(store: JournalBindingStore):
+    """模拟进程崩溃：不合并，只释放文件句柄"""
+    store._closed = True
+    store._wakeup.set()
+    store._compactor.join()
+    store._journal.close()
+    store._writer_lock.close()
+
+
+def _entry(op: str, qqid: str, record: BindingRecord = None) -> str:
+    entry = {"op": op, "qqid": qqid}
+    if record is not None:
+        entry["record"] = record.to_dict()
+    return json.dumps(entry) + "\n"
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return tmp_path / "XM-Turbo.json"
+
+
+def test_reopen_replays_journal(snapshot):
+    store = _open(snapshot)
+    store.put("1", _record(1))
+    store.put("2", _record(2))
+    store.delete("1")
+    _crash(store)
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"2": _record(2)}
+    store.close()
+
+
+def test_close_compacts_into_snapshot(snapshot):
+    store = _open(snapshot)
+    store.apply_batch([("1", _record(1)), ("2", _record(2)), ("1", None)])
+    store.close()
+
+    assert json.loads(snapshot.read_text(encoding="utf-8")) == {"users": {"2": _record(2).to_dict()}}
+    assert snapshot.with_name("XM-Turbo.json.journal").read_text() == ""
+    assert not snapshot.with_name("XM-Turbo.json.journal.1").exists()
+
+
+def test_crash_after_rotation_before_snapshot(snapshot):
+    """合并时日志已轮转为 .journal.1、快照尚未写入时崩溃"""
+    store = _open(snapshot)
+    store.put("1", _record(1))
+    store.close()
+    journal = snapshot.with_name("XM-Turbo.json.journal")
+    rotated = snapshot.with_name("XM-Turbo.json.journal.1")
+    rotated.write_text(_entry("put", "2", _record(2)) + _entry("del", "1"))
+    journal.write_text(_entry("put", "3", _record(3)))
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"2": _record(2), "3": _record(3)}
+    store.close()
+    assert not rotated.exists()
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"2": _record(2), "3": _record(3)}
+    store.close()
+
+
+def test_crash_after_snapshot_before_removing_rotated(snapshot):
+    """快照已替换、.journal.1 尚未删除时崩溃：重放是幂等的"""
+    store = _open(snapshot)
+    store.put("1", _record(1))
+    store.put("2", _record(2))
+    store.delete("1")
+    store._journal.close()
+    os.replace(store.journal_path, store._rotated_path)
+    store._journal = open(store.journal_path, "a", encoding="utf-8")
+    snapshot.write_text(json.dumps({"users": {"2": _record(2).to_dict()}}), encoding="utf-8")
+    _crash(store)
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"2": _record(2)}
+    store.close()
+
+
+def test_unfinished_compaction_keeps_replay_order(snapshot):
+    """上一次合并留下 .journal.1 时，新日志接在它后面，先写后删的顺序不能颠倒"""
+    snapshot.with_name("XM-Turbo.json.journal.1").write_text(_entry("put", "1", _record(1)))
+    store = _open(snapshot)
+    store.delete("1")
+    store.put("2", _record(2))
+    store.compact()
+    _crash(store)
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"2": _record(2)}
+    store.close()
+
+
+def test_torn_tail_is_ignored_and_not_glued_to_next_entry(snapshot):
+    journal = snapshot.with_name("XM-Turbo.json.journal")
+    journal.write_text(_entry("put", "1", _record(1)) + '{"op": "put", "qqid": "2", "rec')
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"1": _record(1)}
+    store.put("3", _record(3))
+    _crash(store)
+
+    store = _open(snapshot)
+    assert dict(store.iter_items()) == {"1": _record(1), "3": _record(3)}
+    store.close()
+
+
+def test_second_writer_is_rejected(snapshot):
+    store = _open(snapshot)
+    try:
+        assert JournalBindingStore.in_use(snapshot)
+        with pytest.raises(RuntimeError):
+            _open(snapshot)
+    finally:
+        store.close()
+    assert not JournalBindingStore.in_use(snapshot)
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+
+from libraries import json_store
+from libraries.binding_record import BindingRecord
+from libraries.json_store import JsonBindingStore
+
+
+def _record(n: int) -> BindingRecord:
+    return BindingRecord(f"token{n}", f"key{n}", 1700000000 + n)
+
+
+def _on_disk(path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))["users"]
+
+
+def test_write_behind_then_flush(tmp_path):
+    path = tmp_path / "XM-Turbo.json"
+    store = JsonBindingStore(path, flush_delay=3600.0)
+    store.put("1", _record(1))
+    store.apply_batch([("2", _record(2)), ("3", _record(3)), ("3", None)])
+    assert store.get("1") == _record(1)
+    assert not store.contains("3")
+    assert not path.exists()  # 修改只在内存中，尚未写盘
+
+    store.flush()
+    assert _on_disk(path) == {"1": _record(1).to_dict(), "2": _record(2).to_dict()}
+    assert store.delete("1")
+    assert not store.delete("1")
+    store.close()
+    assert _on_disk(path) == {"2": _record(2).to_dict()}
+    assert JsonBindingStore(path).get("2") == _record(2)
+
+
+def test_timer_flushes_after_delay(tmp_path):
+    path = tmp_path / "XM-Turbo.json"
+    store = JsonBindingStore(path, flush_delay=0.05)
+    store.put("1", _record(1))
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _on_disk(path) == {"1": _record(1).to_dict()}
+    store.close()
+
+
+def test_reload_after_external_edit_keeps_unflushed_changes(tmp_path):
+    path = tmp_path / "XM-Turbo.json"
+    path.write_text(json.dumps({"users": {"1": _record(1).to_dict()}}), encoding="utf-8")
+    store = JsonBindingStore(path, flush_delay=3600.0, watch=True, poll_interval=3600.0)
+    try:
+        store.put("2", _record(2))
+        store.delete("1")
+        # 外部恢复了一份备份
+        path.write_text(json.dumps({"users": {"1": _record(1).to_dict(), "9": _record(9).to_dict()}}),
+                        encoding="utf-8")
+        store.flush()  # 写盘前先合并外部修改
+        assert store.get("9") == _record(9)
+        assert store.get("2") == _record(2)
+        assert store.get("1") is None
+        assert set(_on_disk(path)) == {"2", "9"}
+    finally:
+        store.close()
+
+
+def test_corrupt_file_loads_empty(tmp_path):
+    path = tmp_path / "XM-Turbo.json"
+    path.write_text('{"users": {"1": ', encoding="utf-8")
+    assert JsonBindingStore(path).count() == 0
+
+
+def test_concurrent_flushes_are_serialized(tmp_path, monkeypatch):
+    path = tmp_path / "XM-Turbo.json"
+    store = JsonBindingStore(path, flush_delay=3600.0)
+    active, peak = [0], [0]
+    encode = json_store.encode_users
+
+    def slow_encode(users):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        active[0] -= 1
+        return encode(users)
+
+    monkeypatch.setattr(json_store, "encode_users", slow_encode)
+
+    def writer(n):
+        store.put(str(n), _record(n))
+        store.flush()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+    assert peak[0] == 1
+    # 最后一次替换的是最新数据，不会被较早的快照覆盖
+    assert set(_on_disk(path)) == {"0", "1", "2", "3"}
+    assert not path.with_name(path.name + ".tmp").exists()
@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+
+from libraries.binding_record import BindingRecord
+from libraries.journal_store import JournalBindingStore
+from libraries.migrate import _JsonStream, export_json, import_json, iter_json_users
+
+
+def _values(text: str, chunk_size: int) -> list:
+    stream = _JsonStream(io.StringIO(text), chunk_size)
+    stream.expect("[")
+    values = []
+    if stream.peek() != "]":
+        while True:
+            values.append(stream.value())
+            if stream.peek() != ",":
+                break
+            stream.expect(",")
+    stream.expect("]")
+    assert stream.peek() == ""
+    return values
+
+
+VALUES = [
+    12345678901234567890,
+    -0.5e-3,
+    "跨块的中文字符串",
+    "escape \" \\ \n é 😀",
+    {"bot_token": "t" * 40, "bot_key": "k", "ts": 1700000000},
+    [1, [2, [3]], {}],
+    True,
+    None,
+    7,
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+def test_stream_values_across_chunk_boundaries(chunk_size):
+    text = json.dumps(VALUES, ensure_ascii=False, indent=1)
+    assert _values(text, chunk_size) == VALUES
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4])
+def test_stream_number_split_at_chunk_boundary(chunk_size):
+    # 块边界落在数字中间时不能把 1234 解析成 12
+    assert _values("[1234, 5]", chunk_size) == [1234, 5]
+    assert _values("[1234]", chunk_size) == [1234]
+    assert _values("[12.5, 1e+3, -7E-2]", chunk_size) == [12.5, 1e+3, -7E-2]
+
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1 2]", '["unterminated]', "[1,]"])
+def test_stream_malformed_input(text):
+    with pytest.raises(ValueError):
+        _values(text, 2)
+
+
+def _write(path, data) -> str:
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def test_iter_json_users_skips_other_keys(tmp_path):
+    users = {"1": {"bot_token": "a", "bot_key": "b", "ts": 1}, "2": {"bot_token": "c", "bot_key": "d", "ts": 2}}
+    path = _write(tmp_path / "XM-Turbo.json", {"version": {"nested": [1, 2]}, "users": users, "tail": "x"})
+    assert dict(iter_json_users(path)) == users
+
+
+@pytest.mark.parametrize("data", [{}, {"users": {}}, {"other": 1}])
+def test_iter_json_users_empty(tmp_path, data):
+    assert list(iter_json_users(_write(tmp_path / "XM-Turbo.json", data))) == []
+
+
+def test_iter_json_users_malformed(tmp_path):
+    path = tmp_path / "XM-Turbo.json"
+    path.write_text('{"users": {"1": {"bot_token": "a"}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_users(path))
+
+
+def _users(n: int) -> dict:
+    return {str(i): BindingRecord(f"token{i}", f"key{i}", 1700000000 + i).to_dict() for i in range(n)}
+
+
+def test_sqlite_round_trip(tmp_path):
+    users = _users(25)
+    source = _write(tmp_path / "XM-Turbo.json", {"users": users})
+    db = tmp_path / "botKey.db"
+    output = tmp_path / "export.json"
+
+    assert import_json(source, "sqlite", db, batch_size=10, merge=False) == 25
+    with pytest.raises(ValueError):
+        import_json(source, "sqlite", db, batch_size=10, merge=False)
+    assert export_json("sqlite", db, output, batch_size=10) == 25
+    assert json.loads(output.read_text(encoding="utf-8")) == {"users": users}
+
+
+def test_journal_export_is_read_only(tmp_path):
+    snapshot = tmp_path / "XM-Turbo.json"
+    store = JournalBindingStore(snapshot, compact_interval=3600.0, compact_threshold=1 << 30)
+    try:
+        for qqid, record in _users(5).items():
+            store.put(qqid, BindingRecord.from_dict(record))
+        store.delete("0")
+        journal = tmp_path / "XM-Turbo.json.journal"
+        before = {p.name: p.read_bytes() for p in tmp_path.iterdir()}
+
+        output = tmp_path / "export.json"
+        assert export_json("journal", snapshot, output, batch_size=2) == 4
+        assert set(json.loads(output.read_text(encoding="utf-8"))["users"]) == {"1", "2", "3", "4"}
+        with pytest.raises(ValueError):
+            export_json("journal", snapshot, snapshot, batch_size=2)
+        after = {p.name: p.read_bytes() for p in tmp_path.iterdir() if p.name != "export.json"}
+        assert after == before
+        assert journal.stat().st_size > 0
+
+        # 运行中的写入者仍可继续写入
+        store.put("9", BindingRecord("token9", "key9", 9))
+    finally:
+        store.close()
+    store = JournalBindingStore(snapshot, compact_interval=3600.0, compact_threshold=1 << 30)
+    try:
+        assert store.count() == 5
+    finally:
+        store.close()
+
+
+def test_import_into_live_journal_is_refused(tmp_path):
+    source = _write(tmp_path / "XM-Turbo.json", {"users": _users(3)})
+    target = tmp_path / "new.json"
+    store = JournalBindingStore(target, compact_interval=3600.0, compact_threshold=1 << 30)
+    try:
+        with pytest.raises(RuntimeError):
+            import_json(source, "journal", target, batch_size=10, merge=False)
+    finally:
+        store.close()
+    assert import_json(source, "journal", target, batch_size=10, merge=False) == 3
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from libraries.rate_limit import RateLimited, RateLimiter, TokenBucket
+
+SCOPE = "https://api.example"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(clock, user_rate=1.0, user_burst=2, global_rate=100.0, global_burst=100, **kwargs) -> RateLimiter:
+    return RateLimiter(user_rate, user_burst, global_rate, global_burst, clock=clock, **kwargs)
+
+
+def _tokens(limiter: RateLimiter, bot_key: str) -> float:
+    return limiter._buckets[bot_key].tokens
+
+
+def test_token_bucket_refill_and_wait():
+    bucket = TokenBucket(2.0, 3, now=0.0)
+    assert [bucket.reserve(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(0.0) == pytest.approx(0.5)
+    assert bucket.reserve(0.0) == pytest.approx(1.0)  # 排在前一个等待者之后
+    bucket.cancel()
+    assert bucket.reserve(10.0) == 0.0
+    assert bucket.tokens == 2  # 不超过容量
+
+
+def test_burst_then_queue(monkeypatch):
+    async def main():
+        clock = FakeClock()
+        limiter = _limiter(clock)
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+
+        monkeypatch.setattr("libraries.rate_limit.asyncio.sleep", fake_sleep)
+        await limiter.acquire(SCOPE, "k", 5.0)
+        await limiter.acquire(SCOPE, "k", 5.0)
+        assert slept == []
+        await limiter.acquire(SCOPE, "k", 5.0)
+        await limiter.acquire(SCOPE, "k", 5.0)
+        assert slept == [pytest.approx(1.0), pytest.approx(2.0)]
+        assert limiter.queued == 2
+        # 不同 botKey 互不影响
+        await limiter.acquire(SCOPE, "other", 0.0)
+
+    asyncio.run(main())
+
+
+def test_reject_returns_both_tokens():
+    async def main():
+        clock = FakeClock()
+        limiter = _limiter(clock, global_burst=10)
+        await limiter.acquire(SCOPE, "k", 0.0)
+        await limiter.acquire(SCOPE, "k", 0.0)
+        global_tokens = limiter._global[SCOPE].tokens
+        with pytest.raises(RateLimited) as info:
+            await limiter.acquire(SCOPE, "k", 0.5)
+        assert info.value.retry_after == pytest.approx(1.0)
+        assert limiter.rejected == 1
+        assert _tokens(limiter, "k") == 0
+        assert limiter._global[SCOPE].tokens == global_tokens
+
+        clock.now += 1.0
+        await limiter.acquire(SCOPE, "k", 0.0)
+
+    asyncio.run(main())
+
+
+def test_global_bucket_limits_all_keys():
+    async def main():
+        limiter = _limiter(FakeClock(), global_rate=1.0, global_burst=2)
+        await limiter.acquire(SCOPE, "a", 0.0)
+        await limiter.acquire(SCOPE, "b", 0.0)
+        with pytest.raises(RateLimited):
+            await limiter.acquire(SCOPE, "c", 0.0)
+        assert _tokens(limiter, "c") == 2  # 被拒绝时 botKey 的令牌同样退回
+        await limiter.acquire("https://other.example", "c", 0.0)  # 全局桶按上游地址区分
+
+    asyncio.run(main())
+
+
+def test_try_acquire_does_not_wait_or_count():
+    clock = FakeClock()
+    limiter = _limiter(clock, user_burst=1)
+    assert limiter.try_acquire(SCOPE, "k")
+    assert not limiter.try_acquire(SCOPE, "k")
+    assert limiter.rejected == 0
+    assert _tokens(limiter, "k") == 0
+
+
+def test_lru_bucket_eviction():
+    async def main():
+        limiter = _limiter(FakeClock(), max_buckets=2)
+        await limiter.acquire(SCOPE, "a", 0.0)
+        await limiter.acquire(SCOPE, "b", 0.0)
+        await limiter.acquire(SCOPE, "a", 0.0)  # a 最近使用过
+        await limiter.acquire(SCOPE, "c", 0.0)
+        assert list(limiter._buckets) == ["a", "c"]
+        assert _tokens(limiter, "a") == 0
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def turbo_api_module(monkeypatch):
+    pytest.importorskip("httpx")
+    from turbobot.config import Config
+    from turbobot.libraries import turbo_api
+
+    monkeypatch.setattr(Config, "rate_limit_user_rate", 1.0)
+    monkeypatch.setattr(Config, "rate_limit_user_burst", 1)
+    return turbo_api
+
+
+@pytest.mark.parametrize("mode, silent", [("shed", True), ("reply", False)])
+def test_rate_limited_reply_by_mode(turbo_api_module, monkeypatch, mode, silent):
+    from turbobot.config import Config
+    from turbobot.libraries.priority import Priority
+
+    monkeypatch.setattr(Config, "rate_limit_mode", mode)
+    api = turbo_api_module.TurboApiClient()
+
+    async def main():
+        await api._throttle("k", Priority.INTERACTIVE)
+        with pytest.raises(turbo_api_module.TurboApiRateLimited) as info:
+            await api._throttle("k", Priority.INTERACTIVE)
+        return info.value
+
+    error = asyncio.run(main())
+    assert error.silent is silent
+    reply = error.describe("获取用户信息")
+    assert (reply == "") is silent
+    if not silent:
+        assert "1 秒后再试" in reply
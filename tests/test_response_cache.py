@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from libraries.response_cache import ResponseCache
+
+EP = "/web/arcadeInfoDetail"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.set("k", "v", 10.0)
+    assert cache.get(EP, "k").value == "v"
+    clock.now += 9.9
+    assert cache.get(EP, "k").value == "v"
+    clock.now += 0.1
+    assert cache.get(EP, "k") is None
+    assert cache.peek("k").value == "v"  # peek 不看是否过期
+
+
+def test_stale_window():
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.set("k", "v", 10.0)
+    clock.now += 15.0
+    entry = cache.get(EP, "k", max_stale=30.0)
+    assert entry.value == "v"
+    assert not cache.is_fresh(entry)
+    assert cache.age(entry) == 15.0
+    assert cache.expires_in(entry) == -5.0
+    clock.now += 25.0
+    assert cache.get(EP, "k", max_stale=30.0) is None
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2, clock=FakeClock())
+    cache.set("a", 1, 10.0)
+    cache.set("b", 2, 10.0)
+    cache.get(EP, "a")  # a 最近使用过
+    cache.set("c", 3, 10.0)
+    assert cache.peek("b") is None
+    assert cache.peek("a").value == 1
+    cache.peek("a")  # peek 不影响淘汰顺序
+    cache.set("a", 4, 10.0)  # 覆盖已有 key 不淘汰其他条目
+    assert len(cache) == 2
+    cache.set("d", 5, 10.0)
+    assert cache.peek("c") is None
+
+
+def test_hit_stale_miss_counts():
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.get(EP, "k")
+    cache.set("k", "v", 10.0)
+    cache.get(EP, "k")
+    cache.get(EP, "k")
+    clock.now += 20.0
+    cache.get(EP, "k", max_stale=30.0)
+    cache.get("/other", "k")
+    assert cache.stats() == {
+        EP: {"hits": 2, "stale": 1, "misses": 1},
+        "/other": {"hits": 0, "stale": 0, "misses": 1},
+    }
+
+
+def test_validators_headers():
+    cache = ResponseCache(clock=FakeClock())
+    assert cache.set("a", 1, 10.0).validators() == {}
+    entry = cache.set("b", 1, 10.0, etag='"v1"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+    assert entry.validators() == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+
+
+class FakeUpstream:
+    """按顺序返回预设响应的 send_request，记录每次请求的请求头"""
+
+    def __init__(self, httpx, *responses):
+        self.httpx = httpx
+        self.responses = list(responses)
+        self.headers = []
+
+    async def __call__(self, method, url, headers=None, **kwargs):
+        self.headers.append(dict(headers or {}))
+        status, body, response_headers = self.responses.pop(0)
+        return self.httpx.Response(status, json=body, headers=response_headers)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    from turbobot.config import Config
+    from turbobot.libraries import turbo_api
+
+    monkeypatch.setattr(Config, "response_cache_policies", {EP: (10.0, False)})
+    monkeypatch.setattr(Config, "response_stale_policies", {EP: 60.0})
+    monkeypatch.setattr(Config, "conditional_requests", True)
+    monkeypatch.setattr(Config, "hedge_paths", [])
+    clock = FakeClock()
+    api = turbo_api.TurboApiClient()
+    api.cache = ResponseCache(clock=clock)
+    api.validators = ResponseCache(clock=clock)
+
+    def upstream(*responses):
+        fake = FakeUpstream(httpx, *responses)
+        monkeypatch.setattr(turbo_api, "send_request", fake)
+        return fake
+
+    return api, clock, upstream
+
+
+def test_not_modified_reuses_value_and_resets_ttl(client):
+    api, clock, upstream = client
+    fake = upstream((200, {"name": "a"}, {"ETag": '"v1"'}), (304, None, {}))
+
+    async def main():
+        first, _ = await api.arcade_info_detail("k", "a")
+        clock.now += 100.0  # 超过 TTL 和过期窗口
+        second, age = await api.arcade_info_detail("k", "a")
+        return first, second, age
+
+    first, second, age = asyncio.run(main())
+    assert second is first
+    assert age is None
+    assert fake.headers[0].get("If-None-Match") is None
+    assert fake.headers[1]["If-None-Match"] == '"v1"'
+    assert api.not_modified == 1
+    entry = api.cache.peek((EP, (("arcadeName", "a"),), None))
+    assert api.cache.is_fresh(entry)
+    assert api.cache.expires_in(entry) == 10.0
+    assert entry.etag == '"v1"'
+
+
+def test_stale_value_served_while_refreshing(client):
+    api, clock, upstream = client
+    upstream((200, {"v": 1}, {}), (200, {"v": 2}, {}))
+
+    async def main():
+        await api.arcade_info_detail("k", "a")
+        clock.now += 30.0
+        stale, age = await api.arcade_info_detail("k", "a")
+        await asyncio.gather(*api._refresh_tasks)
+        fresh, fresh_age = await api.arcade_info_detail("k", "a")
+        return stale, age, fresh, fresh_age
+
+    stale, age, fresh, fresh_age = asyncio.run(main())
+    assert (stale, age) == ({"v": 1}, 30.0)
+    assert (fresh, fresh_age) == ({"v": 2}, None)
+    assert api.cache.stats()[EP] == {"hits": 1, "stale": 1, "misses": 1}
+
+
+def test_uncached_endpoint_keeps_validators_separately(client):
+    api, clock, upstream = client
+    fake = upstream((200, {"user": 1}, {"ETag": '"u1"'}), (304, None, {}))
+
+    async def main():
+        return await api.user("k"), await api.user("k")
+
+    first, second = asyncio.run(main())
+    assert second == first == {"user": 1}
+    assert fake.headers[1]["If-None-Match"] == '"u1"'
+    assert len(api.cache) == 0
+    assert len(api.validators) == 1
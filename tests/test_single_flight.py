@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from libraries.priority import Priority
+from libraries.single_flight import SingleFlight
+
+
+def _factory(calls: list, result, release: asyncio.Event):
+    async def fetch():
+        calls.append(result)
+        await release.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return fetch
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        flight = SingleFlight()
+        calls, release = [], asyncio.Event()
+        tasks = [asyncio.ensure_future(flight.do("k", _factory(calls, i, release))) for i in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*tasks) == [0, 0, 0]
+        assert calls == [0]
+        assert flight.shared == 2
+        assert "k" not in flight
+
+    asyncio.run(main())
+
+
+def test_exception_is_shared_and_cancelling_one_caller_keeps_the_call():
+    async def main():
+        flight = SingleFlight()
+        calls, release = [], asyncio.Event()
+        first = asyncio.ensure_future(flight.do("k", _factory(calls, ValueError("boom"), release)))
+        second = asyncio.ensure_future(flight.do("k", _factory(calls, None, release)))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(ValueError):
+            await second
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+
+def test_interactive_does_not_join_background_call():
+    async def main():
+        flight = SingleFlight()
+        calls, slow, fast = [], asyncio.Event(), asyncio.Event()
+        background = asyncio.ensure_future(flight.do("k", _factory(calls, "background", slow), Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(flight.do("k", _factory(calls, "interactive", fast), Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        # 之后的后台调用加入优先级更高的新请求
+        joined = asyncio.ensure_future(flight.do("k", _factory(calls, "unused", slow), Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        assert calls == ["background", "interactive"]
+
+        fast.set()
+        assert await interactive == "interactive"
+        assert await joined == "interactive"
+        assert not background.done()
+        slow.set()
+        assert await background == "background"
+        assert "k" not in flight  # 旧请求完成时不会删除取代它的请求的记录
+
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import pytest
+
+from libraries.binding_record import BindingRecord
+from libraries.snapshot_store import BindingSnapshot, SnapshotBindingStore, write_snapshot
+from libraries.sqlite_store import SqliteBindingStore
+
+
+def _record(qqid: str) -> BindingRecord:
+    return BindingRecord(f"token-{qqid}", f"key-{qqid}", len(qqid))
+
+
+# 按字节序而不是数值排序："10" < "2"；包含多字节字符
+QQIDS = ["1", "10", "100", "2", "20", "3", "99999999999", "群友", "ä"]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "binding.snap"
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, len(QQIDS)])
+def test_lookup_hits_and_misses(path, n):
+    qqids = QQIDS[:n]
+    assert write_snapshot(path, [(q, _record(q)) for q in reversed(qqids)]) == n
+    snapshot = BindingSnapshot(path)
+    assert len(snapshot) == n
+    for qqid in qqids:
+        assert snapshot.get(qqid) == _record(qqid)
+    for missing in ["", "0", "05", "11", "15", "25", "4", "z", "群", "群友们", "￿"]:
+        assert snapshot.get(missing) is None
+    assert [q for q, _ in snapshot.iter_items()] == sorted(qqids, key=lambda q: q.encode("utf-8"))
+
+
+def test_empty_and_missing(path):
+    snapshot = BindingSnapshot(path)
+    assert len(snapshot) == 0
+    assert snapshot.get("1") is None
+    assert list(snapshot.iter_items()) == []
+
+    write_snapshot(path, [])
+    snapshot.remap()
+    assert snapshot.signature is not None
+    assert len(snapshot) == 0
+    assert snapshot.get("1") is None
+
+
+def test_bad_magic(path):
+    path.write_bytes(b"NOTASNAP" + bytes(8))
+    with pytest.raises(ValueError):
+        BindingSnapshot(path)
+
+
+def test_remap_after_regeneration(path):
+    write_snapshot(path, [("1", _record("1")), ("2", _record("2"))])
+    snapshot = BindingSnapshot(path)
+    items = snapshot.iter_items()
+    assert next(items)[0] == "1"
+
+    write_snapshot(path, [(q, _record(q)) for q in ["2", "3", "4"]])
+    snapshot.remap()
+    assert len(snapshot) == 3
+    assert snapshot.get("1") is None
+    assert snapshot.get("4") == _record("4")
+    # 替换前开始的遍历继续读旧映射，不会混用新记录数
+    assert [q for q, _ in items] == ["2"]
+
+
+def _open(tmp_path, name="binding.snap"):
+    primary = SqliteBindingStore(tmp_path / "botKey.db")
+    return SnapshotBindingStore(primary, tmp_path / name, regenerate_delay=3600.0, poll_interval=3600.0)
+
+
+def test_store_read_after_write_and_regenerate(tmp_path):
+    store = _open(tmp_path)
+    other = _open(tmp_path)  # 模拟另一个进程
+    try:
+        store.put("1", _record("1"))
+        store.put("2", _record("2"))
+        assert store.get("1") == _record("1")
+        assert store.snapshot.get("1") is None
+        assert store.delete("1")
+        assert store.get("1") is None
+        assert other.get("2") is None
+
+        store.flush()
+        assert store._overlay == {}
+        assert store.snapshot.get("2") == _record("2")
+        assert store.snapshot.get("1") is None
+        other._on_change()
+        assert other.get("2") == _record("2")
+        assert other.count() == 1
+    finally:
+        other.close()
+        store.close()
+
+
+def test_store_rebuilds_stale_snapshot_on_open(tmp_path):
+    store = _open(tmp_path)
+    store.put("1", _record("1"))
+    store.close()
+    primary = SqliteBindingStore(tmp_path / "botKey.db")
+    primary.put("2", _record("2"))
+    primary.close()
+
+    store = _open(tmp_path)
+    try:
+        assert len(store.snapshot) == 2
+        assert store.get("2") == _record("2")
+    finally:
+        store.close()
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from turbobot.config import Config  # noqa: E402
+from turbobot.libraries import turbo_api as turbo_api_module  # noqa: E402
+from turbobot.libraries.circuit_breaker import CircuitBreaker  # noqa: E402
+from turbobot.libraries.deadline import command_deadline  # noqa: E402
+from turbobot.libraries.turbo_api import (  # noqa: E402
+    TurboApiClient, TurboApiDeadlineExceeded, TurboApiError, TurboApiTimeout, TurboApiUnavailable,
+)
+
+PATH = "/web/showMaimaiName"
+
+
+class FakeUpstream:
+    """按顺序返回预设结果的 send_request：状态码、异常，或 ("sleep", 秒数) 表示一直不返回"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def __call__(self, method, url, **kwargs):
+        self.calls.append(method)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, tuple):
+            await asyncio.sleep(outcome[1])
+            outcome = 200
+        return httpx.Response(outcome, text="name")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def api(monkeypatch):
+    for name, value in {
+        "retry_max_attempts": 3,
+        "circuit_failure_threshold": 2,
+        "circuit_reset_timeout": 30.0,
+        "rate_limit_user_rate": 1000.0, "rate_limit_user_burst": 1000,
+        "rate_limit_global_rate": 1000.0, "rate_limit_global_burst": 1000,
+        "hedge_paths": [],
+        "api_timeouts": {"default": (0.05, 0.05, 0.05)},
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    monkeypatch.setattr(turbo_api_module, "backoff_delay", lambda attempt, base, cap: 0.0)
+    return TurboApiClient()
+
+
+def _upstream(monkeypatch, *outcomes) -> FakeUpstream:
+    upstream = FakeUpstream(*outcomes)
+    monkeypatch.setattr(turbo_api_module, "send_request", upstream)
+    return upstream
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_get_retries_transport_errors(api, monkeypatch):
+    upstream = _upstream(monkeypatch, httpx.ConnectError("refused"), httpx.ReadError("reset"), 200)
+    assert _run(api._request("GET", PATH, "k")).status_code == 200
+    assert len(upstream.calls) == 3
+    assert api.retries == 2
+    assert api.breakers[PATH]._failures == 0
+
+
+def test_get_gives_up_after_max_attempts(api, monkeypatch):
+    upstream = _upstream(monkeypatch, 503)
+    with pytest.raises(TurboApiError) as info:
+        _run(api._request("GET", PATH, "k"))
+    assert info.value.status_code == 503
+    assert len(upstream.calls) == 3
+    assert api.breakers[PATH]._failures == 1
+
+
+def test_client_errors_are_not_retried_or_counted(api, monkeypatch):
+    upstream = _upstream(monkeypatch, 400)
+    with pytest.raises(TurboApiError) as info:
+        _run(api._request("GET", PATH, "k"))
+    assert info.value.status_code == 400
+    assert len(upstream.calls) == 1
+    assert api.breakers[PATH]._failures == 0
+
+
+@pytest.mark.parametrize("outcome", [httpx.ConnectError("refused"), 503])
+def test_post_is_never_retried(api, monkeypatch, outcome):
+    upstream = _upstream(monkeypatch, outcome, 200)
+    with pytest.raises((httpx.ConnectError, TurboApiError)):
+        _run(api._request("POST", "/web/setMaimaiName", "k", json={}))
+    assert upstream.calls == ["POST"]
+    assert api.retries == 0
+
+
+def test_endpoint_timeout_becomes_turbo_api_timeout(api, monkeypatch):
+    upstream = _upstream(monkeypatch, ("sleep", 1.0))
+    limit = api.concurrency.limit
+    with pytest.raises(TurboApiTimeout) as info:
+        _run(api._request("GET", PATH, "k"))
+    assert not isinstance(info.value, TurboApiDeadlineExceeded)
+    assert len(upstream.calls) == 3
+    assert api.breakers[PATH]._failures == 1
+    assert api.concurrency.limit < limit
+    assert api.concurrency.in_flight == 0
+
+
+def test_retry_stops_when_budget_is_shorter_than_backoff(api, monkeypatch):
+    monkeypatch.setattr(turbo_api_module, "backoff_delay", lambda attempt, base, cap: 1.0)
+    upstream = _upstream(monkeypatch, httpx.ConnectError("refused"), 200)
+
+    @command_deadline(0.5)
+    async def command():
+        return await api._request("GET", PATH, "k")
+
+    with pytest.raises(httpx.ConnectError):
+        _run(command())
+    assert len(upstream.calls) == 1
+    assert api.retries == 0
+
+
+def test_running_out_of_command_budget_is_not_an_upstream_failure(api, monkeypatch):
+    monkeypatch.setattr(Config, "api_timeouts", {"default": (1.0, 1.0, 1.0)})
+    upstream = _upstream(monkeypatch, ("sleep", 0.5))
+    limit = api.concurrency.limit
+
+    @command_deadline(0.05)
+    async def command():
+        return await api._request("GET", PATH, "k")
+
+    for _ in range(3):
+        with pytest.raises(TurboApiDeadlineExceeded):
+            _run(command())
+    assert len(upstream.calls) == 3  # 不重试
+    assert api.breakers[PATH].state == "closed"
+    assert api.breakers[PATH]._failures == 0
+    assert api.concurrency.limit == limit
+    assert api.concurrency.in_flight == 0
+
+
+def test_open_breaker_rejects_without_sending_then_probes(api, monkeypatch):
+    clock = FakeClock()
+    api.breakers[PATH] = CircuitBreaker(2, 30.0, clock=clock)
+    upstream = _upstream(monkeypatch, 503, 503, 503, 503, 503, 503, 200)
+    for _ in range(2):
+        with pytest.raises(TurboApiError):
+            _run(api._request("GET", PATH, "k"))
+    assert len(upstream.calls) == 6
+
+    with pytest.raises(TurboApiUnavailable) as info:
+        _run(api._request("GET", PATH, "k"))
+    assert info.value.retry_after == pytest.approx(30.0)
+    assert len(upstream.calls) == 6
+
+    clock.now += 30.0
+    assert _run(api._request("GET", PATH, "k")).status_code == 200
+    assert api.breakers[PATH].state == "closed"
@@ -0,0 +1,27 @@
+"""pytest 插件：把插件根目录按普通目录收集
+
+插件根目录带有 __init__.py，pytest 默认会把它当作包，在运行测试前导入它，而它依赖 nonebot。
+测试只覆盖 libraries 下不依赖 nonebot 的模块，因此根目录按普通目录收集即可。
+需要插件内相对导入（from ..config import Config）的模块通过 turbobot.libraries.xxx 导入：
+turbobot 指向插件根目录，但不执行其中注册 NoneBot 指令的 __init__.py。
+"""
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+PACKAGE = "turbobot"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collect_directory(path, parent):
+    if path == parent.config.rootpath:
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
+
+
+def pytest_configure(config):
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(Path(config.rootpath))]
+    sys.modules.setdefault(PACKAGE, package)